@@ -3,13 +3,21 @@ Aplikasi Streamlit untuk prediksi Garis Kemiskinan menggunakan Monte Carlo Simul
 """
 
 import streamlit as st
+import io
 import os
 import tempfile
+import uuid
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from data_prep import prepare_data
-from monte_carlo import run_monte_carlo_simulation
+from monte_carlo import (run_monte_carlo_simulation, run_monte_carlo_progressive,
+                         calculate_statistics_intervals, calculate_path_bands,
+                         report_time_grid, replay_simulation)
+from engines import ENGINES
+from executor import SimulationExecutor, estimate_simulation_memory
+from archive import RunArchive, data_hash, request_fingerprint
+from export import export_bytes, export_file_info, statistics_csv
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -38,12 +46,224 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+
+def render_statistics(statistics, intervals, prediction_year):
+    """
+    Menampilkan metrik dan tabel statistik prediksi beserta error bar.
+    """
+    # Tampilkan statistik dalam kolom
+    stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+
+    with stat_col1:
+        st.metric(
+            "Mean (Rata-rata)",
+            f"Rp {statistics['Mean']:,.0f}/bulan",
+            help="Nilai rata-rata dari semua simulasi"
+        )
+
+    with stat_col2:
+        st.metric(
+            "P50 (Median)",
+            f"Rp {statistics['P50']:,.0f}/bulan",
+            help="Nilai tengah (50% simulasi di bawah nilai ini)"
+        )
+
+    with stat_col3:
+        st.metric(
+            "P5 (Percentile 5%)",
+            f"Rp {statistics['P5']:,.0f}/bulan",
+            help="5% simulasi menghasilkan nilai di bawah ini"
+        )
+
+    with stat_col4:
+        st.metric(
+            "P95 (Percentile 95%)",
+            f"Rp {statistics['P95']:,.0f}/bulan",
+            help="95% simulasi menghasilkan nilai di bawah ini"
+        )
+
+    # Tabel statistik detail
+    st.subheader(f"Detail Statistik Prediksi Tahun {prediction_year}")
+    metric_keys = ['Mean', 'P50', 'P5', 'P95']
+    stats_df = pd.DataFrame({
+        'Metrik': ['Mean (Rata-rata)', 'P50 (Median)', 'P5 (Percentile 5%)', 'P95 (Percentile 95%)'],
+        'Nilai Prediksi': [f"Rp {statistics[key]:,.0f}/bulan" for key in metric_keys],
+        'Error Bar (95%)': [
+            f"Rp {intervals[key][0]:,.0f} – Rp {intervals[key][1]:,.0f}"
+            for key in metric_keys
+        ],
+        'Keterangan': [
+            'Nilai rata-rata dari semua simulasi',
+            'Nilai tengah (50% simulasi di bawah nilai ini)',
+            '5% simulasi menghasilkan nilai di bawah ini',
+            '95% simulasi menghasilkan nilai di bawah ini'
+        ]
+    })
+
+    st.dataframe(stats_df, use_container_width=True, hide_index=True)
+
+
+def show_figure(fig, preview=False):
+    """
+    Menampilkan lalu menutup figure matplotlib. Pratinjau digambar dengan
+    resolusi lebih rendah (st.pyplot selalu memakai dpi 200) agar cepat.
+    """
+    if preview:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=PREVIEW_DPI, bbox_inches='tight')
+        st.image(buffer, width='stretch')
+    else:
+        st.pyplot(fig)
+    plt.close(fig)
+
+
+def render_plots(simulation_results, n_paths_to_show, preview=False):
+    """
+    Menampilkan grafik jalur simulasi dan distribusi hasil akhir.
+
+    Pada pratinjau (batch sementara), histogram dan KDE dihitung dari
+    subsampel nilai akhir berjarak tetap (paling banyak PREVIEW_MAX_VALUES)
+    dan grafik digambar dengan resolusi PREVIEW_DPI.
+    """
+    statistics = simulation_results['statistics']
+    paths = simulation_results['paths']
+    years = simulation_results['years']
+    final_values = simulation_results['final_values']
+    # Hasil dari arsip hanya menyimpan jalur contoh beserta pita kuantilnya
+    bands = simulation_results.get('bands') or calculate_path_bands(paths)
+    n_total = len(final_values)
+    if preview and n_total > PREVIEW_MAX_VALUES:
+        final_values = final_values[::int(np.ceil(n_total / PREVIEW_MAX_VALUES))]
+
+    # Plot 1: Jalur Simulasi
+    fig1, ax1 = plt.subplots(figsize=(12, 6))
+
+    # Tampilkan subset jalur
+    n_paths = min(n_paths_to_show, paths.shape[0])
+    indices = np.random.choice(paths.shape[0], n_paths, replace=False)
+
+    for idx in indices:
+        ax1.plot(years, paths[idx, :], alpha=0.1, color='blue', linewidth=0.5)
+
+    # Plot mean path
+    mean_path = bands['Mean']
+    ax1.plot(years, mean_path, color='red', linewidth=2, 
+             label=f'Mean Path (Mean: {statistics["Mean"]:,.0f})')
+
+    # Plot percentiles
+    p5_path = bands['P5']
+    p50_path = bands['P50']
+    p95_path = bands['P95']
+
+    ax1.plot(years, p50_path, color='green', linewidth=2, 
+             linestyle='--', label=f'Median (P50: {statistics["P50"]:,.0f})')
+    ax1.fill_between(years, p5_path, p95_path, alpha=0.2, color='gray',
+                     label=f'90% Confidence Interval (P5-P95)')
+
+    ax1.set_xlabel('Tahun', fontsize=11)
+    ax1.set_ylabel('Garis Kemiskinan (Rupiah/Bulan)', fontsize=11)
+    ax1.set_title(f'Jalur Simulasi ({n_paths} dari {n_total} jalur)', 
+                  fontsize=12, fontweight='bold')
+    ax1.legend(loc='best', fontsize=9)
+    ax1.grid(True, alpha=0.3)
+    ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
+
+    show_figure(fig1, preview)
+
+    # Plot 2: Distribusi Hasil Akhir
+    fig2, ax2 = plt.subplots(figsize=(12, 6))
+
+    # Histogram
+    ax2.hist(final_values, bins=50, alpha=0.7, color='skyblue', 
+             edgecolor='black', density=True)
+
+    # Tambahkan garis vertikal untuk statistik
+    ax2.axvline(statistics['Mean'], color='red', linestyle='-', 
+                linewidth=2, label=f"Mean: {statistics['Mean']:,.0f}")
+    ax2.axvline(statistics['P50'], color='green', linestyle='--', 
+                linewidth=2, label=f"Median (P50): {statistics['P50']:,.0f}")
+    ax2.axvline(statistics['P5'], color='orange', linestyle=':', 
+                linewidth=2, label=f"P5: {statistics['P5']:,.0f}")
+    ax2.axvline(statistics['P95'], color='purple', linestyle=':', 
+                linewidth=2, label=f"P95: {statistics['P95']:,.0f}")
+
+    # KDE curve
+    try:
+        from scipy import stats
+        kde = stats.gaussian_kde(final_values)
+        x_range = np.linspace(final_values.min(), final_values.max(), 200)
+        ax2.plot(x_range, kde(x_range), color='darkblue', linewidth=2, 
+                 label='KDE')
+    except:
+        pass
+
+    ax2.set_xlabel('Garis Kemiskinan (Rupiah/Bulan)', fontsize=11)
+    ax2.set_ylabel('Density', fontsize=11)
+    ax2.set_title('Distribusi Prediksi Tahun Terakhir', fontsize=12, fontweight='bold')
+    ax2.legend(loc='best', fontsize=9)
+    ax2.grid(True, alpha=0.3)
+    ax2.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
+
+    show_figure(fig2, preview)
+
+
+def render_downloads(simulation_results):
+    """
+    Menampilkan tombol download jalur simulasi dan statistik per tahun.
+    """
+    download_col1, download_col2 = st.columns(2)
+
+    def paths_data():
+        # Arsip hanya menyimpan jalur contoh; semua jalur dibangun ulang
+        # dari seed dan parameter yang tersimpan (hasilnya identik)
+        results = simulation_results
+        if results.get('archived'):
+            results = replay_simulation(results)
+        return export_bytes(results, file_format)
+
+    with download_col1:
+        # Ekspor baru dijalankan saat tombol ditekan, bukan di setiap rerun
+        file_format, file_name, mime = export_file_info()
+        st.download_button(
+            "⬇️ Download Jalur Simulasi",
+            data=paths_data,
+            file_name=file_name,
+            mime=mime
+        )
+
+    with download_col2:
+        st.download_button(
+            "⬇️ Download Statistik per Tahun (CSV)",
+            data=statistics_csv(simulation_results),
+            file_name='statistik_simulasi.csv',
+            mime='text/csv'
+        )
+
+
 # Konfigurasi
 POSSIBLE_DATA_FILES = [
     'garis_kemiskinan_di_kota_bandung.xlsx',
     'garis_kemiskinan_di_kota_bandung.csv',
     'data.csv'
 ]
+ARCHIVE_DIR = os.environ.get('RUN_ARCHIVE_DIR', 'run_archive')
+# Pratinjau batch progresif: batas nilai akhir untuk histogram/KDE dan dpi
+PREVIEW_MAX_VALUES = 5000
+PREVIEW_DPI = 100
+MAX_CONCURRENT_SIMULATIONS = int(os.environ.get(
+    'SIMULATION_MAX_CONCURRENT_JOBS', max(1, (os.cpu_count() or 2) // 2)))
+SIMULATION_MEMORY_BUDGET_MB = int(os.environ.get('SIMULATION_MEMORY_BUDGET_MB', 1024))
+
+
+@st.cache_resource
+def get_simulation_executor():
+    """
+    Executor simulasi bersama untuk semua sesi (dibuat sekali per proses).
+    """
+    return SimulationExecutor(
+        max_concurrent_jobs=MAX_CONCURRENT_SIMULATIONS,
+        memory_budget_bytes=SIMULATION_MEMORY_BUDGET_MB * 1024**2
+    )
 
 # Sidebar untuk konfigurasi
 st.sidebar.header("⚙️ Konfigurasi Simulasi")
@@ -66,6 +286,20 @@ prediction_years = st.sidebar.slider(
     step=1
 )
 
+MODEL_LABELS = {
+    'gbm': 'Geometric Brownian Motion',
+    'student_t': 'GBM dengan Shock Student-t',
+    'merton': 'Merton Jump-Diffusion',
+    'log_ou': 'Log Ornstein-Uhlenbeck (Mean-Reverting)'
+}
+
+model = st.sidebar.selectbox(
+    "Model Proses",
+    options=list(MODEL_LABELS),
+    format_func=MODEL_LABELS.get,
+    help="Model stokastik yang dipakai untuk mensimulasikan jalur (parameter tambahan memakai nilai default)"
+)
+
 n_paths_to_show = st.sidebar.slider(
     "Jumlah Jalur yang Ditampilkan",
     min_value=10,
@@ -119,7 +353,7 @@ else:
         st.sidebar.success(f"✅ File ditemukan: {data_file}")
 
 # Tampilkan progress
-with st.spinner('Memuat data dan menjalankan simulasi...'):
+with st.spinner('Memuat data...'):
     try:
         # Persiapan data dan perhitungan parameter
         try:
@@ -175,27 +409,14 @@ with st.spinner('Memuat data dan menjalankan simulasi...'):
             st.info("💡 Tips: Pastikan file memiliki kolom 'tahun' dan 'jumlah' (atau variasi seperti 'Tahun'/'Year' dan 'Jumlah'/'Value')")
             st.stop()
         
-        # Jalankan simulasi Monte Carlo
-        simulation_results = run_monte_carlo_simulation(
-            S0=last_value,
-            mu=mu,
-            sigma=sigma,
-            n_simulations=n_simulations,
-            prediction_years=prediction_years,
-            start_year=last_year + 1
-        )
-        
-        statistics = simulation_results['statistics']
-        paths = simulation_results['paths']
-        years = simulation_results['years']
-        final_values = simulation_results['final_values']
-        
     except Exception as e:
         st.error(f"❌ Terjadi kesalahan: {str(e)}")
         st.stop()
 
-# Tampilkan informasi data
-st.success("✅ Data berhasil dimuat dan simulasi selesai!")
+
+# Status simulasi (diperbarui setelah semua batch selesai)
+status_placeholder = st.empty()
+status_placeholder.info("⏳ Data berhasil dimuat, simulasi sedang berjalan...")
 
 # Section 1: Informasi Data & Parameter
 st.header("📋 Informasi Data & Parameter")
@@ -229,133 +450,15 @@ with col7:
 st.header("📈 Statistik Prediksi")
 
 prediction_year = int(last_year + prediction_years)
-
-# Tampilkan statistik dalam kolom
-stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
-
-with stat_col1:
-    st.metric(
-        "Mean (Rata-rata)",
-        f"Rp {statistics['Mean']:,.0f}/bulan",
-        help="Nilai rata-rata dari semua simulasi"
-    )
-
-with stat_col2:
-    st.metric(
-        "P50 (Median)",
-        f"Rp {statistics['P50']:,.0f}/bulan",
-        help="Nilai tengah (50% simulasi di bawah nilai ini)"
-    )
-
-with stat_col3:
-    st.metric(
-        "P5 (Percentile 5%)",
-        f"Rp {statistics['P5']:,.0f}/bulan",
-        help="5% simulasi menghasilkan nilai di bawah ini"
-    )
-
-with stat_col4:
-    st.metric(
-        "P95 (Percentile 95%)",
-        f"Rp {statistics['P95']:,.0f}/bulan",
-        help="95% simulasi menghasilkan nilai di bawah ini"
-    )
-
-# Tabel statistik detail
-st.subheader(f"Detail Statistik Prediksi Tahun {prediction_year}")
-stats_df = pd.DataFrame({
-    'Metrik': ['Mean (Rata-rata)', 'P50 (Median)', 'P5 (Percentile 5%)', 'P95 (Percentile 95%)'],
-    'Nilai Prediksi': [
-        f"Rp {statistics['Mean']:,.0f}/bulan",
-        f"Rp {statistics['P50']:,.0f}/bulan",
-        f"Rp {statistics['P5']:,.0f}/bulan",
-        f"Rp {statistics['P95']:,.0f}/bulan"
-    ],
-    'Keterangan': [
-        'Nilai rata-rata dari semua simulasi',
-        'Nilai tengah (50% simulasi di bawah nilai ini)',
-        '5% simulasi menghasilkan nilai di bawah ini',
-        '95% simulasi menghasilkan nilai di bawah ini'
-    ]
-})
-
-st.dataframe(stats_df, use_container_width=True, hide_index=True)
+progress_bar = st.progress(0.0)
+stats_placeholder = st.empty()
 
 # Section 3: Visualisasi
 st.header("📉 Visualisasi Simulasi")
+plots_placeholder = st.empty()
 
-# Plot 1: Jalur Simulasi
-fig1, ax1 = plt.subplots(figsize=(12, 6))
-
-# Tampilkan subset jalur
-n_paths = min(n_paths_to_show, paths.shape[0])
-indices = np.random.choice(paths.shape[0], n_paths, replace=False)
-
-for idx in indices:
-    ax1.plot(years, paths[idx, :], alpha=0.1, color='blue', linewidth=0.5)
-
-# Plot mean path
-mean_path = np.mean(paths, axis=0)
-ax1.plot(years, mean_path, color='red', linewidth=2, 
-         label=f'Mean Path (Mean: {statistics["Mean"]:,.0f})')
-
-# Plot percentiles
-p5_path = np.percentile(paths, 5, axis=0)
-p50_path = np.percentile(paths, 50, axis=0)
-p95_path = np.percentile(paths, 95, axis=0)
-
-ax1.plot(years, p50_path, color='green', linewidth=2, 
-         linestyle='--', label=f'Median (P50: {statistics["P50"]:,.0f})')
-ax1.fill_between(years, p5_path, p95_path, alpha=0.2, color='gray',
-                 label=f'90% Confidence Interval (P5-P95)')
-
-ax1.set_xlabel('Tahun', fontsize=11)
-ax1.set_ylabel('Garis Kemiskinan (Rupiah/Bulan)', fontsize=11)
-ax1.set_title(f'Jalur Simulasi ({n_paths} dari {paths.shape[0]} jalur)', 
-              fontsize=12, fontweight='bold')
-ax1.legend(loc='best', fontsize=9)
-ax1.grid(True, alpha=0.3)
-ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-
-st.pyplot(fig1)
-plt.close(fig1)
-
-# Plot 2: Distribusi Hasil Akhir
-fig2, ax2 = plt.subplots(figsize=(12, 6))
-
-# Histogram
-ax2.hist(final_values, bins=50, alpha=0.7, color='skyblue', 
-         edgecolor='black', density=True)
-
-# Tambahkan garis vertikal untuk statistik
-ax2.axvline(statistics['Mean'], color='red', linestyle='-', 
-            linewidth=2, label=f"Mean: {statistics['Mean']:,.0f}")
-ax2.axvline(statistics['P50'], color='green', linestyle='--', 
-            linewidth=2, label=f"Median (P50): {statistics['P50']:,.0f}")
-ax2.axvline(statistics['P5'], color='orange', linestyle=':', 
-            linewidth=2, label=f"P5: {statistics['P5']:,.0f}")
-ax2.axvline(statistics['P95'], color='purple', linestyle=':', 
-            linewidth=2, label=f"P95: {statistics['P95']:,.0f}")
-
-# KDE curve
-try:
-    from scipy import stats
-    kde = stats.gaussian_kde(final_values)
-    x_range = np.linspace(final_values.min(), final_values.max(), 200)
-    ax2.plot(x_range, kde(x_range), color='darkblue', linewidth=2, 
-             label='KDE')
-except:
-    pass
-
-ax2.set_xlabel('Garis Kemiskinan (Rupiah/Bulan)', fontsize=11)
-ax2.set_ylabel('Density', fontsize=11)
-ax2.set_title('Distribusi Prediksi Tahun Terakhir', fontsize=12, fontweight='bold')
-ax2.legend(loc='best', fontsize=9)
-ax2.grid(True, alpha=0.3)
-ax2.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-
-st.pyplot(fig2)
-plt.close(fig2)
+st.header("💾 Download Hasil Simulasi")
+downloads_placeholder = st.empty()
 
 # Section 4: Data Historis (opsional)
 with st.expander("📊 Lihat Data Historis"):
@@ -382,3 +485,132 @@ st.markdown(
     "</div>",
     unsafe_allow_html=True
 )
+
+# Arsip run: permintaan identik (data, parameter, seed) diambil dari arsip
+archive = RunArchive(ARCHIVE_DIR)
+region_cols = [col for col in df_processed.columns if 'nama' in col and 'kabupaten' in col]
+if region_cols:
+    region = str(df_processed[region_cols[0]].iloc[-1])
+else:
+    region = os.path.basename(uploaded_file.name if uploaded_file is not None else data_file)
+current_data_hash = data_hash(df_processed, columns=('tahun', 'jumlah', 'log_return'))
+# Seed diturunkan dari data agar hasil dapat direproduksi antar sesi
+simulation_seed = int(current_data_hash[:16], 16)
+fingerprint = request_fingerprint(
+    data_hash=current_data_hash,
+    n_simulations=n_simulations,
+    prediction_years=prediction_years,
+    start_year=last_year + 1,
+    model=model,
+    seed=simulation_seed
+)
+# Hasil lengkap di sesi ini dipakai lebih dulu (arsip hanya menyimpan jalur contoh)
+if st.session_state.get('simulation_fingerprint') == fingerprint:
+    archived_results = st.session_state['simulation_results']
+else:
+    archived_results = archive.load(fingerprint)
+
+
+def render_results(simulation_results, preview=False, update_plots=True):
+    """
+    Memperbarui placeholder statistik dan grafik.
+
+    Pada pratinjau (batch sementara) grafik digambar lebih murah (lihat
+    render_plots); update_plots=False hanya memperbarui statistik.
+    """
+    with stats_placeholder.container():
+        render_statistics(
+            simulation_results['statistics'],
+            calculate_statistics_intervals(simulation_results['final_values']),
+            prediction_year
+        )
+
+    if update_plots:
+        with plots_placeholder.container():
+            render_plots(simulation_results, n_paths_to_show, preview)
+
+
+if archived_results is not None:
+    progress_bar.empty()
+    render_results(archived_results)
+    with downloads_placeholder.container():
+        render_downloads(archived_results)
+    if archived_results.get('archived'):
+        status_placeholder.success("✅ Data berhasil dimuat, hasil simulasi diambil dari arsip run!")
+    else:
+        status_placeholder.success("✅ Data berhasil dimuat dan simulasi selesai!")
+    st.stop()
+
+# Semua sesi berbagi satu executor dengan batas konkurensi dan memori;
+# setiap batch adalah satu job, dijadwalkan bergiliran antar sesi
+executor = get_simulation_executor()
+session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex)
+
+
+def run_batch_on_executor(**kwargs):
+    """
+    Menjalankan satu batch simulasi di executor bersama sambil menampilkan
+    posisi antrean.
+    """
+    times = report_time_grid(kwargs['prediction_years'], kwargs['steps_per_year'],
+                             kwargs['report_times'])
+    memory_bytes = estimate_simulation_memory(
+        kwargs['n_simulations'], len(times) - 1,
+        len(ENGINES[kwargs['model']].variates))
+    job = executor.submit(session_id, run_monte_carlo_simulation,
+                          memory_bytes=memory_bytes, **kwargs)
+    try:
+        while not job.wait(timeout=0.25):
+            position = job.queue_position
+            if position:
+                status_placeholder.info(f"⏳ Menunggu giliran di antrean simulasi (posisi ke-{position})...")
+            else:
+                status_placeholder.info("⏳ Data berhasil dimuat, simulasi sedang berjalan...")
+    finally:
+        # Jika run ini dihentikan (input berubah), keluarkan job dari antrean
+        job.cancel()
+    return job.result()
+
+
+# Jalankan simulasi Monte Carlo secara bertahap
+# Statistik diperbarui setelah setiap batch, grafik pratinjau setiap dua
+# batch dan grafik penuh setelah batch terakhir. Jika input berubah,
+# Streamlit menghentikan script ini pada pemanggilan st.* berikutnya, jadi
+# run yang sudah usang berhenti di batas batch. Hasil sebelumnya di sesi ini
+# diperluas (tambah jalur/tahun) jika parameternya sama.
+st.session_state.pop('simulation_fingerprint', None)
+try:
+    for batch, simulation_results in enumerate(run_monte_carlo_progressive(
+        S0=last_value,
+        mu=mu,
+        sigma=sigma,
+        n_simulations=n_simulations,
+        prediction_years=prediction_years,
+        start_year=last_year + 1,
+        model=model,
+        seed=simulation_seed,
+        previous_result=st.session_state.get('simulation_results'),
+        run_batch=run_batch_on_executor
+    )):
+        st.session_state['simulation_results'] = simulation_results
+        n_done = simulation_results['paths'].shape[0]
+        progress_bar.progress(
+            n_done / n_simulations,
+            text=f"{n_done:,} dari {n_simulations:,} jalur"
+        )
+        # Batch sementara: grafik murah dan hanya setiap dua batch; grafik
+        # resolusi penuh hanya digambar sekali untuk batch terakhir
+        final_batch = n_done >= n_simulations
+        render_results(simulation_results, preview=not final_batch,
+                       update_plots=final_batch or batch % 2 == 0)
+
+    archive.save(fingerprint, simulation_results, current_data_hash, region)
+    st.session_state['simulation_fingerprint'] = fingerprint
+    with downloads_placeholder.container():
+        render_downloads(simulation_results)
+except Exception as e:
+    st.error(f"❌ Terjadi kesalahan: {str(e)}")
+    st.stop()
+
+progress_bar.empty()
+status_placeholder.success("✅ Data berhasil dimuat dan simulasi selesai!")
@@ -0,0 +1,316 @@
+"""
+Modul arsip run simulasi: menyimpan hasil setiap run secara lokal agar
+bisa diambil ulang dan dibandingkan tanpa menjalankan simulasi lagi.
+
+Setiap run disimpan sebagai satu file .npz (kolom per array: tahun, pita
+kuantil per tahun, nilai akhir, contoh jalur) dan dicatat di indeks SQLite
+berdasarkan fingerprint permintaan, region dan tanggal.
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import zipfile
+import tempfile
+from contextlib import closing
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from monte_carlo import calculate_path_bands
+
+
+def data_hash(df, columns=('tahun', 'jumlah')):
+    """
+    Menghitung hash SHA-256 dari isi kolom data historis.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Data historis
+    columns : tuple
+        Kolom yang di-hash (default: tahun dan jumlah)
+
+    Returns:
+    --------
+    str
+        Hash heksadesimal
+    """
+    values = df[list(columns)].to_numpy(dtype=float)
+    return hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+
+def request_fingerprint(**request):
+    """
+    Menghitung fingerprint dari parameter permintaan simulasi.
+
+    Dua permintaan dengan parameter yang sama (termasuk data_hash dan seed)
+    menghasilkan fingerprint yang sama.
+
+    Returns:
+    --------
+    str
+        Hash heksadesimal SHA-256 dari parameter (JSON terurut)
+    """
+    payload = json.dumps(request, sort_keys=True, default=json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def json_default(value):
+    """Konversi tipe numpy untuk json.dumps."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tipe tidak didukung: {type(value)}")
+
+
+class RunArchive:
+    """
+    Arsip lokal hasil run_monte_carlo_simulation.
+
+    Parameters:
+    -----------
+    directory : str
+        Folder arsip (default: 'run_archive')
+    """
+
+    STATISTICS = ('Mean', 'P5', 'P50', 'P95')
+
+    def __init__(self, directory='run_archive'):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.sqlite')
+        os.makedirs(directory, exist_ok=True)
+        with closing(sqlite3.connect(self.index_path)) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    fingerprint TEXT PRIMARY KEY,
+                    region TEXT,
+                    created_at TEXT,
+                    data_hash TEXT,
+                    seed TEXT,
+                    model TEXT,
+                    n_simulations INTEGER,
+                    prediction_years REAL,
+                    S0 REAL,
+                    mu REAL,
+                    sigma REAL,
+                    Mean REAL,
+                    P5 REAL,
+                    P50 REAL,
+                    P95 REAL,
+                    file TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_region ON runs (region, created_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        return closing(conn)
+
+    def save(self, fingerprint, simulation_results, data_hash, region=None,
+             n_sample_paths=500):
+        """
+        Menyimpan hasil simulasi ke arsip.
+
+        Yang disimpan: parameter, seed, statistik, pita kuantil per tahun,
+        nilai akhir (float32) dan contoh jalur untuk grafik. Seluruh matriks
+        jalur tidak disimpan.
+
+        Parameters:
+        -----------
+        fingerprint : str
+            Fingerprint permintaan (lihat request_fingerprint)
+        simulation_results : dict
+            Hasil dari run_monte_carlo_simulation
+        data_hash : str
+            Hash data historis (lihat data_hash)
+        region : str
+            Nama region (optional)
+        n_sample_paths : int
+            Jumlah jalur contoh yang disimpan (default: 500)
+        """
+        paths = simulation_results['paths']
+        params = simulation_results['parameters']
+        statistics = simulation_results['statistics']
+        bands = calculate_path_bands(paths)
+        metadata = {
+            'parameters': params,
+            'statistics': statistics,
+            'seed': simulation_results['seed'],
+            'n_simulations': paths.shape[0]
+        }
+
+        # Ditulis ke file sementara lalu di-rename, agar sesi lain yang
+        # membaca fingerprint yang sama tidak melihat file setengah jadi
+        file_name = f"{fingerprint}.npz"
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.npz.tmp',
+                                         delete=False) as tmp_file:
+            try:
+                np.savez_compressed(
+                    tmp_file,
+                    years=simulation_results['years'],
+                    final_values=simulation_results['final_values'].astype(np.float32),
+                    sample_paths=paths[:n_sample_paths].astype(np.float32),
+                    metadata=json.dumps(metadata, default=json_default),
+                    **{f"band_{name}": bands[name] for name in self.STATISTICS}
+                )
+            except BaseException:
+                tmp_file.close()
+                os.remove(tmp_file.name)
+                raise
+        os.replace(tmp_file.name, os.path.join(self.directory, file_name))
+
+        row = {
+            'fingerprint': fingerprint,
+            'region': region,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'data_hash': data_hash,
+            'seed': str(simulation_results['seed']),
+            'model': params.get('model', 'gbm'),
+            'n_simulations': int(paths.shape[0]),
+            'prediction_years': float(params['report_times'][-1]),
+            'S0': float(params['S0']),
+            'mu': float(params['mu']),
+            'sigma': float(params['sigma']),
+            **{name: float(statistics[name]) for name in self.STATISTICS},
+            'file': file_name
+        }
+        columns = ', '.join(row)
+        placeholders = ', '.join('?' for _ in row)
+        with self._connect() as conn, conn:
+            conn.execute(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})",
+                         list(row.values()))
+
+    def _file_for(self, fingerprint):
+        with self._connect() as conn:
+            row = conn.execute("SELECT file FROM runs WHERE fingerprint = ?",
+                               (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(self.directory, row['file'])
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def _read(path, keys):
+        """
+        Membaca array dari file .npz. File yang rusak atau tidak lengkap
+        dianggap tidak ada di arsip (None).
+        """
+        try:
+            with np.load(path) as data:
+                return {key: data[key] for key in keys}
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return None
+
+    def load(self, fingerprint):
+        """
+        Mengambil hasil run dari arsip.
+
+        Parameters:
+        -----------
+        fingerprint : str
+            Fingerprint permintaan
+
+        Returns:
+        --------
+        dict atau None
+            Dictionary dengan struktur seperti hasil run_monte_carlo_simulation
+            ('paths' berisi jalur contoh) ditambah 'bands', 'fingerprint' dan
+            'archived', atau None jika tidak ada di arsip atau filenya tidak
+            dapat dibaca
+        """
+        path = self._file_for(fingerprint)
+        if path is None:
+            return None
+
+        band_keys = [f"band_{name}" for name in self.STATISTICS]
+        data = self._read(path, ['metadata', 'sample_paths', 'years',
+                                 'final_values'] + band_keys)
+        if data is None:
+            return None
+        try:
+            metadata = json.loads(str(data['metadata']))
+        except ValueError:
+            return None
+        result = {
+            'paths': data['sample_paths'].astype(float),
+            'years': data['years'],
+            'final_values': data['final_values'].astype(float),
+            'bands': {name: data[f"band_{name}"] for name in self.STATISTICS}
+        }
+        result['statistics'] = metadata['statistics']
+        result['seed'] = metadata['seed']
+        result['parameters'] = metadata['parameters']
+        result['n_simulations'] = metadata['n_simulations']
+        result['fingerprint'] = fingerprint
+        result['archived'] = True
+        return result
+
+    def bands(self, fingerprint):
+        """
+        Mengambil pita kuantil per tahun tanpa memuat nilai akhir.
+
+        Returns:
+        --------
+        pd.DataFrame atau None
+            Kolom year, Mean, P5, P50, P95
+        """
+        path = self._file_for(fingerprint)
+        if path is None:
+            return None
+        data = self._read(path, ['years'] + [f"band_{name}" for name in self.STATISTICS])
+        if data is None:
+            return None
+        bands = {'year': data['years']}
+        bands.update({name: data[f"band_{name}"] for name in self.STATISTICS})
+        return pd.DataFrame(bands)
+
+    def list_runs(self, region=None, limit=50):
+        """
+        Menampilkan daftar run di arsip, terbaru lebih dulu.
+
+        Parameters:
+        -----------
+        region : str
+            Filter region (optional)
+        limit : int
+            Jumlah baris maksimum (default: 50)
+
+        Returns:
+        --------
+        pd.DataFrame
+        """
+        query = "SELECT * FROM runs"
+        args = []
+        if region is not None:
+            query += " WHERE region = ?"
+            args.append(region)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=args)
+
+    def compare(self, fingerprint_a, fingerprint_b):
+        """
+        Membandingkan pita kuantil dua run per tahun.
+
+        Tahun dicocokkan berdasarkan nilai tahun; hanya tahun yang ada di
+        kedua run yang dibandingkan.
+
+        Returns:
+        --------
+        pd.DataFrame
+            Kolom year, lalu untuk setiap statistik: nilai run A, nilai run B,
+            dan selisih (B - A)
+        """
+        bands_a = self.bands(fingerprint_a)
+        bands_b = self.bands(fingerprint_b)
+        if bands_a is None or bands_b is None:
+            raise ValueError("Run tidak ditemukan di arsip")
+
+        merged = bands_a.merge(bands_b, on='year', suffixes=('_a', '_b'))
+        for name in self.STATISTICS:
+            merged[f"{name}_diff"] = merged[f"{name}_b"] - merged[f"{name}_a"]
+        return merged
@@ -0,0 +1,194 @@
+"""
+Modul untuk backtesting walk-forward (rolling origin) model
+Geometric Brownian Motion terhadap data historis.
+"""
+
+import numpy as np
+import pandas as pd
+from data_prep import calculate_log_returns, calculate_parameters
+
+
+def _build_origins(df, year_col, value_col, region_col, min_history,
+                   max_horizon):
+    """
+    Menyusun daftar origin (titik potong) dari data historis.
+
+    Untuk setiap region dan setiap tahun potong, parameter mu dan sigma
+    diestimasi hanya dari data sampai tahun potong tersebut (prefix).
+
+    Returns:
+    --------
+    list
+        List dict berisi region, origin_year, S0, mu, sigma, dan nilai
+        aktual per horizon (NaN jika tahun target tidak ada di data)
+    """
+    if region_col is None:
+        groups = [(None, df)]
+    else:
+        groups = list(df.groupby(region_col, sort=True))
+
+    origins = []
+    for region, group in groups:
+        group = group.sort_values(by=year_col)
+        years = group[year_col].to_numpy()
+        values = group[value_col].to_numpy(dtype=float)
+        actual_by_year = dict(zip(years, values))
+
+        for k in range(min_history, len(group)):
+            prefix = calculate_log_returns(group.iloc[:k], year_col, value_col)
+            mu, sigma = calculate_parameters(prefix)
+            origin_year = years[k - 1]
+            actuals = [actual_by_year.get(origin_year + h, np.nan)
+                       for h in range(1, max_horizon + 1)]
+            origins.append({
+                'region': region,
+                'origin_year': origin_year,
+                'S0': values[k - 1],
+                'mu': mu,
+                'sigma': sigma,
+                'actuals': actuals
+            })
+    return origins
+
+
+def _sample_crps(sorted_samples, observations):
+    """
+    Menghitung CRPS empiris dari sampel yang sudah diurutkan.
+
+    CRPS = E|X - y| - 0.5 * E|X - X'|, dengan suku kedua dihitung dalam
+    O(n) dari sampel terurut: E|X - X'| = 2/n² * Σ (2i - n - 1) * x_(i).
+
+    Parameters:
+    -----------
+    sorted_samples : np.ndarray
+        Sampel terurut pada axis 1, shape (n_origins, n_simulations, horizon)
+    observations : np.ndarray
+        Nilai aktual, shape (n_origins, horizon)
+
+    Returns:
+    --------
+    np.ndarray
+        CRPS dengan shape (n_origins, horizon)
+    """
+    n = sorted_samples.shape[1]
+    weights = (2 * np.arange(1, n + 1) - n - 1)[None, :, None]
+    spread = np.sum(weights * sorted_samples, axis=1) / n**2
+    accuracy = np.mean(np.abs(sorted_samples - observations[:, None, :]),
+                       axis=1)
+    return accuracy - spread
+
+
+def walk_forward_backtest(df, year_col='tahun', value_col='jumlah',
+                          region_col=None, min_history=4, max_horizon=5,
+                          n_simulations=2000, seed=None):
+    """
+    Backtest walk-forward untuk prediksi Geometric Brownian Motion.
+
+    Untuk setiap tahun potong historis, mu dan sigma diestimasi ulang dari
+    data sebelumnya, lalu tahun-tahun berikutnya diprediksi dan dibandingkan
+    dengan nilai aktual. Semua origin (dan semua region) disimulasikan dalam
+    satu batch array sekaligus.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Data historis (misalnya hasil load_data)
+    year_col : str
+        Nama kolom tahun
+    value_col : str
+        Nama kolom nilai
+    region_col : str
+        Nama kolom region untuk backtest multi-region (optional)
+    min_history : int
+        Jumlah tahun minimum sebelum origin pertama (default: 4, minimal 3
+        agar ada 2 log return untuk menghitung sigma)
+    max_horizon : int
+        Horizon prediksi maksimum dalam tahun (default: 5)
+    n_simulations : int
+        Jumlah simulasi per origin (default: 2000)
+    seed : int
+        Seed untuk random generator (optional)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Satu baris per (origin, horizon) yang memiliki nilai aktual, dengan
+        kolom origin_year, target_year, horizon, actual, mu, sigma, Mean,
+        P5, P50, P95, covered (aktual di dalam P5-P95), crps, error
+        (P50 - aktual) dan abs_pct_error. Kolom region ditambahkan jika
+        region_col diberikan.
+    """
+    if min_history < 3:
+        raise ValueError("min_history minimal 3 (dibutuhkan 2 log return untuk menghitung sigma)")
+
+    origins = _build_origins(df, year_col, value_col, region_col,
+                             min_history, max_horizon)
+    if not origins:
+        raise ValueError(f"Data terlalu pendek untuk backtest: dibutuhkan lebih dari {min_history} tahun")
+
+    S0 = np.array([o['S0'] for o in origins])[:, None, None]
+    mu = np.array([o['mu'] for o in origins])[:, None, None]
+    sigma = np.array([o['sigma'] for o in origins])[:, None, None]
+    actuals = np.array([o['actuals'] for o in origins])
+
+    # Simulasi semua origin sekaligus: shape (n_origins, n_simulations, horizon)
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((len(origins), n_simulations, max_horizon))
+    log_steps = (mu - 0.5 * sigma**2) + sigma * shocks
+    samples = S0 * np.exp(np.cumsum(log_steps, axis=2))
+    samples.sort(axis=1)
+
+    mean = np.mean(samples, axis=1)
+    p5, p50, p95 = np.percentile(samples, [5, 50, 95], axis=1)
+    crps = _sample_crps(samples, actuals)
+
+    origin_idx, horizon_idx = np.nonzero(~np.isnan(actuals))
+    actual = actuals[origin_idx, horizon_idx]
+    results = pd.DataFrame({
+        'origin_year': [origins[i]['origin_year'] for i in origin_idx],
+        'horizon': horizon_idx + 1,
+        'actual': actual,
+        'mu': mu[origin_idx, 0, 0],
+        'sigma': sigma[origin_idx, 0, 0],
+        'Mean': mean[origin_idx, horizon_idx],
+        'P5': p5[origin_idx, horizon_idx],
+        'P50': p50[origin_idx, horizon_idx],
+        'P95': p95[origin_idx, horizon_idx],
+        'crps': crps[origin_idx, horizon_idx]
+    })
+    results.insert(1, 'target_year', results['origin_year'] + results['horizon'])
+    results['covered'] = (results['P5'] <= actual) & (actual <= results['P95'])
+    results['error'] = results['P50'] - actual
+    results['abs_pct_error'] = np.abs(results['error']) / actual * 100
+
+    if region_col is not None:
+        results.insert(0, region_col, [origins[i]['region'] for i in origin_idx])
+
+    return results
+
+
+def summarize_backtest(results, by='horizon'):
+    """
+    Meringkas hasil walk_forward_backtest per horizon (atau kolom lain).
+
+    Parameters:
+    -----------
+    results : pd.DataFrame
+        Hasil walk_forward_backtest
+    by : str atau list
+        Kolom pengelompokan (default: 'horizon')
+
+    Returns:
+    --------
+    pd.DataFrame
+        Kolom n_forecasts, coverage_p5_p95 (target ideal 0.90), mean_crps,
+        mae dan mape
+    """
+    grouped = results.groupby(by)
+    return pd.DataFrame({
+        'n_forecasts': grouped.size(),
+        'coverage_p5_p95': grouped['covered'].mean(),
+        'mean_crps': grouped['crps'].mean(),
+        'mae': grouped['error'].apply(lambda e: np.mean(np.abs(e))),
+        'mape': grouped['abs_pct_error'].mean()
+    })
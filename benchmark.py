@@ -0,0 +1,60 @@
+"""
+Benchmark throughput (jalur per detik) untuk setiap engine model proses.
+
+Jalankan: python benchmark.py
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from engines import ENGINES
+from monte_carlo import run_monte_carlo_simulation
+
+
+def benchmark_engines(n_simulations=100000, prediction_years=10,
+                      chunk_size=None, n_workers=1, repeats=3, seed=0):
+    """
+    Mengukur throughput run_monte_carlo_simulation untuk setiap model.
+
+    Parameters:
+    -----------
+    n_simulations : int
+        Jumlah jalur per run (default: 100000)
+    prediction_years : int
+        Periode prediksi dalam tahun (default: 10)
+    chunk_size : int
+        Jumlah jalur per chunk (optional)
+    n_workers : int
+        Jumlah thread (default: 1)
+    repeats : int
+        Jumlah pengulangan; waktu terbaik yang dilaporkan (default: 3)
+    seed : int
+        Seed untuk random generator (default: 0)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Kolom model, seconds, paths_per_second dan steps_per_second
+    """
+    rows = []
+    for model in ENGINES:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run_monte_carlo_simulation(
+                S0=100.0, mu=0.05, sigma=0.1, n_simulations=n_simulations,
+                prediction_years=prediction_years, seed=seed, model=model,
+                chunk_size=chunk_size, n_workers=n_workers)
+            timings.append(time.perf_counter() - start)
+        seconds = np.min(timings)
+        rows.append({
+            'model': model,
+            'seconds': seconds,
+            'paths_per_second': n_simulations / seconds,
+            'steps_per_second': n_simulations * prediction_years / seconds
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    print(benchmark_engines().to_string(index=False))
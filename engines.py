@@ -0,0 +1,313 @@
+"""
+Modul engine model proses untuk simulasi Monte Carlo.
+
+Setiap engine mendefinisikan variat acak yang dibutuhkan per interval dan
+kernel tervektorisasi yang mengubah variat tersebut menjadi jalur. RNG,
+chunking, statistik dan paralelisasi ditangani oleh run_monte_carlo_simulation
+sehingga sama untuk semua model.
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class ProcessEngine(ABC):
+    """
+    Kelas dasar engine model proses.
+
+    Subclass mengisi `variates` (nama variat acak per interval, masing-masing
+    memakai stream RNG sendiri), `_draw` jika variatnya bukan satu normal
+    standar, dan kernel `simulate`. Model yang increment log-nya tidak
+    bergantung pada nilai jalur cukup menurunkan LogIncrementEngine.
+
+    Satu interval laporan dapat mencakup beberapa langkah waktu (lihat
+    report_time_grid). Engine yang increment-nya teragregasi eksak (GBM,
+    Merton, log-OU) cukup mengambil variat untuk seluruh interval; engine
+    lain harus memakai n_steps pada `_draw`.
+
+    Parameters:
+    -----------
+    S0 : float
+        Nilai awal
+    mu : float
+        Drift parameter (rata-rata log return per tahun)
+    sigma : float
+        Volatility parameter
+    """
+
+    name = None
+    variates = ('normal',)
+
+    def __init__(self, S0, mu, sigma):
+        self.S0 = S0
+        self.mu = mu
+        self.sigma = sigma
+
+    @property
+    def n_variates(self):
+        return len(self.variates)
+
+    @property
+    def params(self):
+        """Parameter tambahan model (selain S0, mu, sigma)."""
+        return {}
+
+    def draw(self, generators, n_paths, dt, n_steps=1):
+        """
+        Mengambil variat acak untuk satu interval.
+
+        Parameters:
+        -----------
+        generators : list
+            Satu np.random.Generator per variat untuk interval ini
+        n_paths : int
+            Jumlah jalur
+        dt : float
+            Lebar interval (tahun)
+        n_steps : int
+            Jumlah langkah waktu di dalam interval (default: 1)
+
+        Returns:
+        --------
+        np.ndarray
+            Array dengan shape (n_variates, n_paths)
+        """
+        return np.stack(self._draw(generators, n_paths, dt, n_steps))
+
+    def _draw(self, generators, n_paths, dt, n_steps):
+        return [generators[0].standard_normal(n_paths)]
+
+    @abstractmethod
+    def simulate(self, start_values, dt, variates, t0=0.0):
+        """
+        Kernel tervektorisasi: mensimulasikan satu chunk jalur.
+
+        Parameters:
+        -----------
+        start_values : float atau np.ndarray
+            Nilai awal setiap jalur
+        dt : np.ndarray
+            Lebar setiap interval, shape (T,)
+        variates : np.ndarray
+            Variat acak dengan shape (n_variates, n_paths, T)
+        t0 : float
+            Waktu (tahun) dari kolom awal, dipakai model yang bergantung
+            waktu saat melanjutkan jalur
+
+        Returns:
+        --------
+        np.ndarray
+            Array dengan shape (n_paths, T+1)
+        """
+
+
+class LogIncrementEngine(ProcessEngine):
+    """
+    Kelas dasar engine dengan S(t+dt) = S(t)·exp(X), dengan increment log X
+    yang hanya bergantung pada dt, variat dan waktu (bukan nilai jalur).
+
+    Subclass mengisi `_log_increments`.
+    """
+
+    @abstractmethod
+    def _log_increments(self, dt, variates, t0):
+        """
+        Increment log untuk semua jalur dan interval.
+
+        Parameters:
+        -----------
+        dt : np.ndarray
+            Lebar setiap interval, shape (1, T)
+        variates : np.ndarray
+            Variat acak dengan shape (n_variates, n_paths, T)
+        t0 : float
+            Waktu (tahun) dari kolom awal
+
+        Returns:
+        --------
+        np.ndarray
+            Array dengan shape (n_paths, T)
+        """
+
+    def simulate(self, start_values, dt, variates, t0=0.0):
+        n_paths, T = variates.shape[1], variates.shape[2]
+        increments = self._log_increments(dt[None, :], variates, t0)
+        paths = np.empty((n_paths, T + 1))
+        paths[:, 0] = start_values
+        for t in range(1, T + 1):
+            paths[:, t] = paths[:, t-1] * np.exp(increments[:, t-1])
+        return paths
+
+
+class GBMEngine(LogIncrementEngine):
+    """
+    Geometric Brownian Motion: ln S(t+dt) - ln S(t) = (μ - 0.5σ²)dt + σ√dt·Z.
+    """
+
+    name = 'gbm'
+
+    def _log_increments(self, dt, variates, t0):
+        drift = (self.mu - 0.5 * self.sigma**2) * dt
+        diffusion = self.sigma * np.sqrt(dt) * variates[0]
+        return drift + diffusion
+
+
+class StudentTEngine(LogIncrementEngine):
+    """
+    GBM dengan shock Student-t (ekor tebal), diskalakan ke varians 1 agar
+    sigma tetap bermakna sebagai volatilitas.
+
+    Satu shock t per langkah waktu. Jumlah beberapa shock t tidak lagi
+    berdistribusi t, sehingga interval dengan n_steps langkah memakai jumlah
+    n_steps shock (dibagi √n_steps), bukan satu shock yang diskalakan.
+
+    Parameters:
+    -----------
+    degrees_of_freedom : float
+        Derajat kebebasan distribusi t, harus > 2 (default: 5)
+    """
+
+    name = 'student_t'
+
+    def __init__(self, S0, mu, sigma, degrees_of_freedom=5):
+        super().__init__(S0, mu, sigma)
+        if degrees_of_freedom <= 2:
+            raise ValueError("degrees_of_freedom harus lebih besar dari 2 agar varians terdefinisi")
+        self.degrees_of_freedom = degrees_of_freedom
+
+    @property
+    def params(self):
+        return {'degrees_of_freedom': self.degrees_of_freedom}
+
+    def _draw(self, generators, n_paths, dt, n_steps):
+        df = self.degrees_of_freedom
+        shocks = generators[0].standard_t(df, (n_paths, n_steps)).sum(axis=1)
+        return [shocks * np.sqrt((df - 2) / df / n_steps)]
+
+    def _log_increments(self, dt, variates, t0):
+        drift = (self.mu - 0.5 * self.sigma**2) * dt
+        diffusion = self.sigma * np.sqrt(dt) * variates[0]
+        return drift + diffusion
+
+
+class MertonJumpEngine(LogIncrementEngine):
+    """
+    Merton jump-diffusion: GBM ditambah lompatan log-normal yang datang
+    sebagai proses Poisson. Drift dikompensasi sehingga E[S(t)] = S0·e^(μt).
+
+    Jumlah lompatan dalam interval dt ~ Poisson(λdt), dan jumlah N lompatan
+    N(m, s²) dihitung eksak sebagai N·m + s·√N·Z.
+
+    Parameters:
+    -----------
+    jump_intensity : float
+        λ, rata-rata jumlah lompatan per tahun (default: 0.1)
+    jump_mean : float
+        m, rata-rata ukuran lompatan log (default: 0.0)
+    jump_std : float
+        s, standar deviasi ukuran lompatan log (default: 0.05)
+    """
+
+    name = 'merton'
+    variates = ('normal', 'jump_count', 'jump_size')
+
+    def __init__(self, S0, mu, sigma, jump_intensity=0.1, jump_mean=0.0,
+                 jump_std=0.05):
+        super().__init__(S0, mu, sigma)
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+
+    @property
+    def params(self):
+        return {'jump_intensity': self.jump_intensity,
+                'jump_mean': self.jump_mean, 'jump_std': self.jump_std}
+
+    def _draw(self, generators, n_paths, dt, n_steps):
+        return [generators[0].standard_normal(n_paths),
+                generators[1].poisson(self.jump_intensity * dt, n_paths),
+                generators[2].standard_normal(n_paths)]
+
+    def _log_increments(self, dt, variates, t0):
+        normal, jump_count, jump_size = variates
+        kappa = np.exp(self.jump_mean + 0.5 * self.jump_std**2) - 1
+        drift = (self.mu - 0.5 * self.sigma**2 - self.jump_intensity * kappa) * dt
+        diffusion = self.sigma * np.sqrt(dt) * normal
+        jumps = jump_count * self.jump_mean + self.jump_std * np.sqrt(jump_count) * jump_size
+        return drift + diffusion + jumps
+
+
+class LogOUEngine(ProcessEngine):
+    """
+    Log Ornstein-Uhlenbeck (mean-reverting) di sekitar tren μt.
+
+    Y(t) = ln S(t) - μt mengikuti dY = κ(θ - Y)dt + σdW dengan diskretisasi
+    eksak Y(t+dt) = θ + (Y(t) - θ)e^(-κdt) + σ√((1 - e^(-2κdt))/(2κ))·Z.
+
+    Parameters:
+    -----------
+    mean_reversion : float
+        κ, kecepatan kembali ke level jangka panjang per tahun (default: 0.5)
+    long_run_level : float
+        Level jangka panjang e^θ (di luar tren). Default: S0, artinya jalur
+        berfluktuasi di sekitar tren S0·e^(μt).
+    """
+
+    name = 'log_ou'
+
+    def __init__(self, S0, mu, sigma, mean_reversion=0.5,
+                 long_run_level=None):
+        super().__init__(S0, mu, sigma)
+        if mean_reversion <= 0:
+            raise ValueError("mean_reversion harus lebih besar dari 0")
+        self.mean_reversion = mean_reversion
+        self.long_run_level = long_run_level if long_run_level is not None else S0
+
+    @property
+    def params(self):
+        return {'mean_reversion': self.mean_reversion,
+                'long_run_level': self.long_run_level}
+
+    def simulate(self, start_values, dt, variates, t0=0.0):
+        n_paths, T = variates.shape[1], variates.shape[2]
+        kappa = self.mean_reversion
+        theta = np.log(self.long_run_level)
+        decay = np.exp(-kappa * dt)
+        scale = self.sigma * np.sqrt((1 - np.exp(-2 * kappa * dt)) / (2 * kappa))
+        times = t0 + np.concatenate([[0.0], np.cumsum(dt)])
+
+        paths = np.empty((n_paths, T + 1))
+        paths[:, 0] = start_values
+        Y = np.log(paths[:, 0]) - self.mu * times[0]
+        for t in range(1, T + 1):
+            Y = theta + (Y - theta) * decay[t-1] + scale[t-1] * variates[0, :, t-1]
+            paths[:, t] = np.exp(Y + self.mu * times[t])
+        return paths
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (GBMEngine, StudentTEngine, MertonJumpEngine, LogOUEngine)
+}
+
+
+def create_engine(model, S0, mu, sigma, **model_params):
+    """
+    Membuat engine berdasarkan nama model.
+
+    Parameters:
+    -----------
+    model : str
+        Salah satu dari ENGINES: 'gbm', 'student_t', 'merton', 'log_ou'
+    S0, mu, sigma : float
+        Parameter dasar model
+    **model_params :
+        Parameter tambahan khusus model
+
+    Returns:
+    --------
+    ProcessEngine
+    """
+    if model not in ENGINES:
+        raise ValueError(f"Model tidak dikenal: {model}. Pilihan: {list(ENGINES)}")
+    return ENGINES[model](S0, mu, sigma, **model_params)
@@ -0,0 +1,258 @@
+"""
+Modul executor simulasi bersama untuk semua sesi Streamlit.
+
+Executor membatasi jumlah job simulasi yang berjalan bersamaan dan total
+memori perkiraannya, lalu menjadwalkan antrean secara round-robin antar sesi
+sehingga satu sesi dengan banyak job tidak menahan sesi lain.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+
+BYTES_PER_VALUE = 8
+
+
+def estimate_simulation_memory(n_simulations, n_intervals, n_variates=1):
+    """
+    Memperkirakan memori (bytes) satu run_monte_carlo_simulation.
+
+    Matriks jalur berukuran n_simulations × (T+1) ditambah variat acak
+    n_variates × n_simulations × T, dan satu salinan jalur saat hasil
+    sebelumnya diperluas.
+
+    Parameters:
+    -----------
+    n_simulations : int
+        Jumlah jalur
+    n_intervals : int
+        Jumlah interval laporan T (prediction_years untuk laporan tahunan)
+    n_variates : int
+        Jumlah variat acak per interval (default: 1)
+
+    Returns:
+    --------
+    int
+        Perkiraan memori dalam bytes
+    """
+    paths = n_simulations * (n_intervals + 1)
+    variates = n_variates * n_simulations * n_intervals
+    return (2 * paths + variates) * BYTES_PER_VALUE
+
+
+class SimulationJob:
+    """
+    Satu job di SimulationExecutor. Dibuat lewat SimulationExecutor.submit.
+    """
+
+    def __init__(self, executor, session_id, fn, args, kwargs, memory_bytes):
+        self.executor = executor
+        self.session_id = session_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.memory_bytes = memory_bytes
+        self.state = 'queued'
+        self._result = None
+        self._error = None
+        self._done = threading.Event()
+
+    def _run(self):
+        # BaseException ikut ditangkap (misalnya exception kontrol skrip
+        # Streamlit) agar worker tetap hidup; error dilempar ulang di result()
+        try:
+            self._result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.state = 'done'
+            self._done.set()
+
+    @property
+    def queue_position(self):
+        """
+        Posisi di antrean (1 = job berikutnya yang dijalankan), atau 0 jika
+        sudah berjalan/selesai.
+        """
+        return self.executor.queue_position(self)
+
+    def wait(self, timeout=None):
+        """
+        Menunggu job selesai. Mengembalikan True jika sudah selesai.
+        """
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """
+        Menunggu dan mengembalikan hasil job (atau melempar error-nya).
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Job simulasi belum selesai")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def cancel(self):
+        """
+        Membatalkan job yang masih di antrean. Job yang sudah berjalan
+        dibiarkan selesai, hasilnya diabaikan.
+
+        Returns:
+        --------
+        bool
+            True jika job dikeluarkan dari antrean
+        """
+        return self.executor._cancel(self)
+
+
+class SimulationExecutor:
+    """
+    Executor bersama dengan batas konkurensi, anggaran memori dan penjadwalan
+    adil (round-robin) antar sesi.
+
+    Job dari satu sesi dijalankan berurutan (FIFO); antar sesi, job diambil
+    bergiliran. Job berikutnya baru dijalankan jika total memori job yang
+    berjalan ditambah job tersebut masih di bawah anggaran (job yang lebih
+    besar dari anggaran tetap dijalankan jika tidak ada job lain berjalan).
+
+    Parameters:
+    -----------
+    max_concurrent_jobs : int
+        Jumlah job maksimum yang berjalan bersamaan (default: 2)
+    memory_budget_bytes : int
+        Total perkiraan memori job yang boleh berjalan bersamaan
+        (default: 1 GB)
+    """
+
+    def __init__(self, max_concurrent_jobs=2, memory_budget_bytes=1024**3):
+        if max_concurrent_jobs < 1:
+            raise ValueError("max_concurrent_jobs minimal 1")
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.memory_budget_bytes = memory_budget_bytes
+        self._queues = OrderedDict()
+        self._running = set()
+        self._running_memory = 0
+        self._condition = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._worker, daemon=True,
+                             name=f"simulation-worker-{i}")
+            for i in range(max_concurrent_jobs)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, session_id, fn, *args, memory_bytes=0, **kwargs):
+        """
+        Memasukkan job ke antrean sesi session_id.
+
+        Parameters:
+        -----------
+        session_id : str
+            Identitas sesi pemilik job (dasar penjadwalan adil)
+        fn : callable
+            Fungsi yang dijalankan, misalnya run_monte_carlo_simulation
+        memory_bytes : int
+            Perkiraan memori job (lihat estimate_simulation_memory)
+        *args, **kwargs :
+            Argumen untuk fn
+
+        Returns:
+        --------
+        SimulationJob
+        """
+        job = SimulationJob(self, session_id, fn, args, kwargs, memory_bytes)
+        with self._condition:
+            self._queues.setdefault(session_id, deque()).append(job)
+            self._condition.notify_all()
+        return job
+
+    def _dispatch_order(self):
+        """
+        Urutan job antrean menurut giliran round-robin antar sesi.
+        Harus dipanggil saat memegang lock.
+        """
+        queues = [list(queue) for queue in self._queues.values()]
+        order = []
+        depth = 0
+        while True:
+            layer = [queue[depth] for queue in queues if depth < len(queue)]
+            if not layer:
+                return order
+            order.extend(layer)
+            depth += 1
+
+    def queue_position(self, job):
+        """
+        Posisi job di antrean (1 = berikutnya), atau 0 jika tidak di antrean.
+        """
+        with self._condition:
+            order = self._dispatch_order()
+            return order.index(job) + 1 if job in order else 0
+
+    def stats(self):
+        """
+        Ringkasan kondisi executor.
+
+        Returns:
+        --------
+        dict
+            running_jobs, queued_jobs, running_memory_bytes, active_sessions
+        """
+        with self._condition:
+            return {
+                'running_jobs': len(self._running),
+                'queued_jobs': sum(len(queue) for queue in self._queues.values()),
+                'running_memory_bytes': self._running_memory,
+                'active_sessions': len(self._queues)
+            }
+
+    def _cancel(self, job):
+        with self._condition:
+            queue = self._queues.get(job.session_id)
+            if queue is None or job not in queue:
+                return False
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.session_id]
+            job.state = 'cancelled'
+            job._done.set()
+            self._condition.notify_all()
+            return True
+
+    def _next_job(self):
+        """
+        Mengambil job berikutnya jika memori mencukupi. Harus dipanggil saat
+        memegang lock. Sesi yang dilayani dipindah ke akhir giliran.
+        """
+        if not self._queues:
+            return None
+        session_id, queue = next(iter(self._queues.items()))
+        job = queue[0]
+        fits = self._running_memory + job.memory_bytes <= self.memory_budget_bytes
+        if not fits and self._running:
+            return None
+
+        queue.popleft()
+        del self._queues[session_id]
+        if queue:
+            self._queues[session_id] = queue
+        return job
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+                job.state = 'running'
+                self._running.add(job)
+                self._running_memory += job.memory_bytes
+
+            try:
+                job._run()
+            finally:
+                with self._condition:
+                    self._running.discard(job)
+                    self._running_memory -= job.memory_bytes
+                    self._condition.notify_all()
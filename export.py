@@ -0,0 +1,215 @@
+"""
+Modul untuk ekspor hasil simulasi (jalur, tahun dan statistik) ke Parquet
+atau CSV ter-gzip secara bertahap per chunk baris, tanpa membangun seluruh
+tabel jalur sebagai satu DataFrame.
+"""
+
+import io
+import json
+import gzip
+import numpy as np
+import pandas as pd
+from monte_carlo import calculate_path_bands
+from archive import json_default
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow opsional, fallback ke CSV gzip
+    pa = None
+    pq = None
+
+
+def year_columns(years):
+    """
+    Nama kolom untuk setiap tahun (bilangan bulat jika memungkinkan).
+
+    Tahun pecahan ditulis dengan representasi terpendek yang tetap unik,
+    sehingga grid laporan halus (misalnya harian) tidak menghasilkan nama
+    kolom ganda.
+    """
+    return [np.format_float_positional(float(year), trim='-') for year in years]
+
+
+def iter_path_chunks(simulation_results, chunk_size=10000):
+    """
+    Menghasilkan jalur simulasi sebagai DataFrame per chunk baris.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    chunk_size : int
+        Jumlah jalur per chunk (default: 10000)
+
+    Yields:
+    -------
+    pd.DataFrame
+        Kolom path_id lalu satu kolom per tahun
+    """
+    paths = simulation_results['paths']
+    columns = year_columns(simulation_results['years'])
+    for start in range(0, paths.shape[0], chunk_size):
+        chunk = pd.DataFrame(paths[start:start + chunk_size], columns=columns)
+        chunk.insert(0, 'path_id', np.arange(start, start + len(chunk)))
+        yield chunk
+
+
+def statistics_table(simulation_results):
+    """
+    Tabel statistik per tahun (Mean, P5, P50, P95) untuk ekspor.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation (atau dari arsip run)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Kolom tahun, Mean, P5, P50, P95
+    """
+    bands = simulation_results.get('bands') or calculate_path_bands(simulation_results['paths'])
+    table = pd.DataFrame(bands)
+    table.insert(0, 'tahun', simulation_results['years'])
+    return table
+
+
+def _metadata(simulation_results):
+    """
+    Metadata run (tahun, statistik, parameter) sebagai JSON.
+    """
+    return {
+        'years': json.dumps(simulation_results['years'], default=json_default),
+        'statistics': json.dumps(simulation_results['statistics'], default=json_default),
+        'parameters': json.dumps(simulation_results.get('parameters', {}),
+                                 default=json_default)
+    }
+
+
+def write_parquet(simulation_results, target, chunk_size=10000):
+    """
+    Menulis jalur simulasi ke Parquet, satu row group per chunk.
+
+    Tahun, statistik dan parameter disimpan di metadata skema Parquet.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    target : str atau file-like
+        Path file atau objek file biner yang dapat ditulis
+    chunk_size : int
+        Jumlah jalur per row group (default: 10000)
+    """
+    if pq is None:
+        raise ImportError("pyarrow diperlukan untuk ekspor Parquet (pip install pyarrow)")
+
+    columns = year_columns(simulation_results['years'])
+    schema = pa.schema(
+        [('path_id', pa.int64())] + [(column, pa.float64()) for column in columns],
+        metadata=_metadata(simulation_results)
+    )
+    with pq.ParquetWriter(target, schema) as writer:
+        for chunk in iter_path_chunks(simulation_results, chunk_size):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema,
+                                                    preserve_index=False))
+
+
+def write_csv_gzip(simulation_results, target, chunk_size=10000):
+    """
+    Menulis jalur simulasi ke CSV ter-gzip secara bertahap per chunk.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    target : str atau file-like
+        Path file atau objek file biner yang dapat ditulis
+    chunk_size : int
+        Jumlah jalur per chunk (default: 10000)
+    """
+    with gzip.open(target, 'wt', encoding='utf-8', newline='') as stream:
+        for i, chunk in enumerate(iter_path_chunks(simulation_results, chunk_size)):
+            chunk.to_csv(stream, header=(i == 0), index=False)
+
+
+def export_file_info(file_format=None):
+    """
+    Nama file dan MIME type untuk format ekspor.
+
+    Parameters:
+    -----------
+    file_format : str
+        'parquet' atau 'csv' (default: parquet jika pyarrow tersedia)
+
+    Returns:
+    --------
+    tuple
+        (file_format, file_name, mime)
+    """
+    if file_format is None:
+        file_format = 'parquet' if pq is not None else 'csv'
+
+    if file_format == 'parquet':
+        return file_format, 'simulasi_monte_carlo.parquet', 'application/vnd.apache.parquet'
+    if file_format == 'csv':
+        return file_format, 'simulasi_monte_carlo.csv.gz', 'application/gzip'
+    raise ValueError(f"Format tidak dikenal: {file_format}. Gunakan 'parquet' atau 'csv'")
+
+
+def export_simulation(simulation_results, target, file_format=None,
+                      chunk_size=10000):
+    """
+    Mengekspor jalur simulasi ke Parquet, atau CSV gzip jika pyarrow tidak
+    tersedia.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    target : str atau file-like
+        Path file atau objek file biner yang dapat ditulis
+    file_format : str
+        'parquet' atau 'csv' (default: parquet jika pyarrow tersedia)
+    chunk_size : int
+        Jumlah jalur per chunk (default: 10000)
+
+    Returns:
+    --------
+    str
+        Format yang dipakai: 'parquet' atau 'csv'
+    """
+    file_format = export_file_info(file_format)[0]
+    if file_format == 'parquet':
+        write_parquet(simulation_results, target, chunk_size)
+    else:
+        write_csv_gzip(simulation_results, target, chunk_size)
+    return file_format
+
+
+def export_bytes(simulation_results, file_format=None, chunk_size=10000):
+    """
+    Mengekspor jalur simulasi dan mengembalikan isi file sebagai bytes.
+
+    Dipakai sebagai data tertunda st.download_button, sehingga ekspor hanya
+    dijalankan saat pengguna menekan tombol. Streamlit menyimpan isi file
+    di memori, jadi file langsung ditulis ke buffer memori.
+
+    Returns:
+    --------
+    bytes
+        Isi file Parquet atau CSV gzip
+    """
+    buffer = io.BytesIO()
+    export_simulation(simulation_results, buffer, file_format, chunk_size)
+    return buffer.getvalue()
+
+
+def statistics_csv(simulation_results):
+    """
+    Tabel statistik per tahun sebagai bytes CSV (ukurannya kecil).
+    """
+    buffer = io.StringIO()
+    statistics_table(simulation_results).to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
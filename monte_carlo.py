@@ -5,11 +5,14 @@ Modul untuk simulasi Monte Carlo menggunakan Geometric Brownian Motion.
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import base64
+from engines import GBMEngine, create_engine
 
 
-def geometric_brownian_motion(S0, mu, sigma, T, dt, n_simulations):
+def geometric_brownian_motion(S0, mu, sigma, T, dt, n_simulations,
+                              random_shocks=None):
     """
     Simulasi Geometric Brownian Motion untuk prediksi harga.
     
@@ -18,48 +21,307 @@ def geometric_brownian_motion(S0, mu, sigma, T, dt, n_simulations):
     
     Parameters:
     -----------
-    S0 : float
-        Nilai awal (harga terakhir dari data historis)
+    S0 : float atau np.ndarray
+        Nilai awal (harga terakhir dari data historis). Boleh berupa array
+        dengan panjang n_simulations untuk melanjutkan jalur yang sudah ada.
     mu : float
         Drift parameter (rata-rata log return)
     sigma : float
         Volatility parameter (standar deviasi log return)
     T : int
         Periode prediksi (dalam tahun)
-    dt : float
-        Time step (default: 1 untuk tahunan)
+    dt : float atau np.ndarray
+        Time step (default: 1 untuk tahunan). Boleh berupa array dengan
+        panjang T berisi lebar tiap interval (grid waktu tidak seragam).
     n_simulations : int
         Jumlah simulasi (path)
+    random_shocks : np.ndarray, optional
+        Shock normal standar dengan shape (n_simulations, T). Jika None,
+        shock dibangkitkan dari np.random.
     
     Returns:
     --------
     np.ndarray
         Array dengan shape (n_simulations, T+1) berisi semua jalur simulasi
     """
-    # Inisialisasi array untuk menyimpan semua jalur
-    paths = np.zeros((n_simulations, T + 1))
-    paths[:, 0] = S0  # Set nilai awal untuk semua simulasi
-    
     # Generate random numbers untuk semua time steps sekaligus
     # Menggunakan vectorization untuk efisiensi
-    random_shocks = np.random.normal(0, 1, (n_simulations, T))
+    if random_shocks is None:
+        random_shocks = np.random.normal(0, 1, (n_simulations, T))
+    
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), (T,))
+    
+    # S(t) = S(t-1) * exp((μ - 0.5*σ²)*dt + σ*√dt*Z), lihat GBMEngine
+    engine = GBMEngine(S0, mu, sigma)
+    return engine.simulate(S0, dt, random_shocks[None])
+
+
+def report_time_grid(prediction_years, steps_per_year=1, report_times=None):
+    """
+    Menyusun waktu laporan (checkpoint) untuk simulasi.
+    
+    Hanya nilai pada waktu laporan yang disimpan. Karena increment log GBM
+    antara dua checkpoint berdistribusi tepat N((μ - 0.5σ²)Δ, σ²Δ),
+    langkah-langkah halus di antara checkpoint diagregasi menjadi satu shock
+    tanpa aproksimasi. Simulasi bulanan yang dilaporkan per akhir tahun
+    memakai memori yang sama dengan simulasi tahunan.
+    
+    Parameters:
+    -----------
+    prediction_years : int
+        Periode prediksi dalam tahun
+    steps_per_year : int
+        Jumlah langkah per tahun, misalnya 12 untuk bulanan atau 52 untuk
+        mingguan (default: 1)
+    report_times : array-like
+        Waktu laporan dalam tahun (optional), harus berada di grid
+        1/steps_per_year. Default: setiap akhir tahun. Akhir periode
+        prediksi selalu disertakan.
+    
+    Returns:
+    --------
+    np.ndarray
+        Waktu laporan dalam tahun, diawali 0
+    """
+    if report_times is None:
+        return np.arange(0, prediction_years + 1)
+    
+    steps = np.asarray(report_times, dtype=float) * steps_per_year
+    grid_steps = np.round(steps)
+    if not np.allclose(steps, grid_steps):
+        raise ValueError(f"report_times harus berada di grid 1/{steps_per_year} tahun")
+    grid_steps = np.union1d(grid_steps, [prediction_years * steps_per_year])
+    if grid_steps[0] <= 0 or grid_steps[-1] > prediction_years * steps_per_year:
+        raise ValueError(f"report_times harus berada di antara 0 dan {prediction_years} tahun")
+    return np.concatenate([[0.0], grid_steps / steps_per_year])
+
+
+def _interval_generators(seed, n_intervals, n_variates=1, rng_states=None):
+    """
+    Membuat generator acak per interval laporan dan per jenis variat.
+    
+    Variat ke-k pada interval t memakai stream sendiri (SeedSequence dengan
+    spawn_key (t,) untuk k = 0 dan (t, k) untuk k > 0), dan variat jalur
+    ke-i adalah bilangan ke-i dari stream tersebut. Dengan susunan ini,
+    menambah interval, menambah jalur, atau membagi jalur ke dalam chunk
+    tidak mengubah variat yang sudah dipakai sebelumnya.
+    
+    Parameters:
+    -----------
+    seed : int
+        Seed dasar simulasi
+    n_intervals : int
+        Jumlah interval yang dibutuhkan
+    n_variates : int
+        Jumlah jenis variat per interval (default: 1)
+    rng_states : list, optional
+        State bit generator tersimpan; stream (t, k) dilanjutkan dari
+        rng_states[t][k] jika tersedia
+    
+    Returns:
+    --------
+    list
+        List dengan panjang n_intervals, masing-masing list n_variates
+        np.random.Generator
+    """
+    generators = []
+    for t in range(n_intervals):
+        interval_generators = []
+        for k in range(n_variates):
+            spawn_key = (t,) if k == 0 else (t, k)
+            bit_generator = np.random.PCG64(
+                np.random.SeedSequence(seed, spawn_key=spawn_key))
+            if rng_states is not None and t < len(rng_states):
+                bit_generator.state = rng_states[t][k]
+            interval_generators.append(np.random.Generator(bit_generator))
+        generators.append(interval_generators)
+    return generators
+
+
+def _draw_variates(engine, generators, n_paths, dt, steps_per_year=1):
+    """
+    Mengambil n_paths variat berikutnya dari setiap stream interval.
+    
+    Jumlah langkah waktu per interval (dt·steps_per_year, dibulatkan ke
+    atas) diteruskan ke engine.
     
-    # Simulasi untuk setiap time step
-    for t in range(1, T + 1):
-        # Geometric Brownian Motion formula
-        # S(t) = S(t-1) * exp((μ - 0.5*σ²)*dt + σ*√dt*Z)
-        drift = (mu - 0.5 * sigma**2) * dt
-        diffusion = sigma * np.sqrt(dt) * random_shocks[:, t-1]
-        paths[:, t] = paths[:, t-1] * np.exp(drift + diffusion)
+    Returns:
+    --------
+    np.ndarray
+        Array dengan shape (n_variates, n_paths, len(generators))
+    """
+    variates = np.empty((engine.n_variates, n_paths, len(generators)))
+    n_steps = np.maximum(np.ceil(dt * steps_per_year - 1e-9), 1).astype(int)
+    for t, interval_generators in enumerate(generators):
+        variates[:, :, t] = engine.draw(interval_generators, n_paths, dt[t],
+                                        n_steps[t])
+    return variates
+
+
+def _simulate_chunked(engine, start_values, dt, generators, n_paths, t0=0.0,
+                      steps_per_year=1, chunk_size=None, n_workers=1):
+    """
+    Mensimulasikan n_paths jalur dalam chunk, opsional paralel.
+    
+    Variat diambil berurutan per chunk di thread pemanggil (agar urutan
+    stream tetap), kemudian kernel engine untuk setiap chunk dijalankan di
+    thread pool. Kernel numpy melepas GIL, sehingga chunk dapat berjalan
+    bersamaan.
     
+    Returns:
+    --------
+    np.ndarray
+        Array dengan shape (n_paths, len(dt) + 1)
+    """
+    paths = np.empty((n_paths, len(dt) + 1))
+    start_values = np.broadcast_to(start_values, (n_paths,))
+    chunk_size = chunk_size or n_paths
+    
+    def run_chunk(start, variates):
+        end = start + variates.shape[1]
+        paths[start:end] = engine.simulate(start_values[start:end], dt,
+                                           variates, t0)
+    
+    with ThreadPoolExecutor(max_workers=max(n_workers, 1)) as executor:
+        futures = []
+        for start in range(0, n_paths, chunk_size):
+            size = min(chunk_size, n_paths - start)
+            variates = _draw_variates(engine, generators, size, dt,
+                                      steps_per_year)
+            futures.append(executor.submit(run_chunk, start, variates))
+        for future in futures:
+            future.result()
     return paths
 
 
+def calculate_statistics(final_values):
+    """
+    Menghitung statistik ringkasan (Mean, P5, P50, P95) dari nilai akhir.
+    
+    Parameters:
+    -----------
+    final_values : np.ndarray
+        Nilai akhir dari setiap simulasi
+    
+    Returns:
+    --------
+    dict
+        Dictionary dengan key Mean, P5, P50, P95
+    """
+    return {
+        'Mean': np.mean(final_values),
+        'P5': np.percentile(final_values, 5),
+        'P50': np.percentile(final_values, 50),  # Median
+        'P95': np.percentile(final_values, 95)
+    }
+
+
+def calculate_path_bands(paths):
+    """
+    Menghitung pita statistik per tahun (Mean, P5, P50, P95) dari semua jalur.
+    
+    Parameters:
+    -----------
+    paths : np.ndarray
+        Array jalur dengan shape (n_simulations, T+1)
+    
+    Returns:
+    --------
+    dict
+        Dictionary dengan key Mean, P5, P50, P95 dan nilai array panjang T+1
+    """
+    p5, p50, p95 = np.percentile(paths, [5, 50, 95], axis=0)
+    return {
+        'Mean': np.mean(paths, axis=0),
+        'P5': p5,
+        'P50': p50,
+        'P95': p95
+    }
+
+
+def calculate_statistics_intervals(final_values, confidence=0.95):
+    """
+    Menghitung error bar (confidence interval) untuk Mean, P5, P50, P95.
+    
+    Mean memakai pendekatan normal (std/√n). Percentile memakai interval
+    order statistic: rank n·p ± z·√(n·p·(1-p)), sehingga tidak bergantung
+    pada bentuk distribusi.
+    
+    Parameters:
+    -----------
+    final_values : np.ndarray
+        Nilai akhir dari setiap simulasi
+    confidence : float
+        Tingkat kepercayaan (default: 0.95)
+    
+    Returns:
+    --------
+    dict
+        Dictionary dengan key Mean, P5, P50, P95 dan nilai tuple (low, high)
+    """
+    from scipy import stats
+    
+    n = len(final_values)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    sorted_values = np.sort(final_values)
+    
+    mean = np.mean(final_values)
+    half_width = z * np.std(final_values, ddof=1) / np.sqrt(n)
+    intervals = {'Mean': (mean - half_width, mean + half_width)}
+    
+    for name, p in (('P5', 0.05), ('P50', 0.5), ('P95', 0.95)):
+        spread = z * np.sqrt(n * p * (1 - p))
+        low = int(np.clip(np.floor(n * p - spread), 0, n - 1))
+        high = int(np.clip(np.ceil(n * p + spread), 0, n - 1))
+        intervals[name] = (sorted_values[low], sorted_values[high])
+    
+    return intervals
+
+
+def _can_extend(previous_result, engine, n_simulations, times, seed,
+                steps_per_year=1):
+    """
+    Mengecek apakah previous_result bisa diperluas menjadi permintaan baru.
+    """
+    if previous_result is None or 'rng_states' not in previous_result:
+        return False
+    params = previous_result['parameters']
+    if (params['S0'], params['mu'], params['sigma']) != (engine.S0, engine.mu, engine.sigma):
+        return False
+    if (params.get('model'), params.get('model_params')) != (engine.name, engine.params):
+        return False
+    if params.get('steps_per_year', 1) != steps_per_year:
+        return False
+    if seed is not None and seed != previous_result['seed']:
+        return False
+    old_times = params['report_times']
+    if len(times) < len(old_times) or not np.array_equal(times[:len(old_times)], old_times):
+        return False
+    return n_simulations >= previous_result['paths'].shape[0]
+
+
 def run_monte_carlo_simulation(S0, mu, sigma, n_simulations=10000, 
-                                prediction_years=5, start_year=None):
+                                prediction_years=5, start_year=None,
+                                seed=None, previous_result=None,
+                                steps_per_year=1, report_times=None,
+                                model='gbm', model_params=None,
+                                chunk_size=None, n_workers=1):
     """
     Menjalankan simulasi Monte Carlo lengkap.
     
+    Jika previous_result diberikan dan parameternya sama (S0, mu, sigma,
+    seed), jalur yang sudah ada dipakai ulang: tahun tambahan dilanjutkan
+    dari kolom terakhir, jalur tambahan diambil dari lanjutan stream acak
+    yang sama. Hasilnya identik dengan menjalankan ulang dari awal dengan
+    seed yang sama.
+    
+    Dengan steps_per_year > 1 (misalnya 12 untuk bulanan), hanya nilai pada
+    report_times yang disimpan; increment di antara checkpoint diagregasi
+    secara eksak (lihat report_time_grid).
+    
+    Model proses dipilih lewat model (lihat engines.ENGINES). Semua model
+    memakai RNG, chunking, statistik dan paralelisasi yang sama.
+    
     Parameters:
     -----------
     S0 : float
@@ -74,45 +336,200 @@ def run_monte_carlo_simulation(S0, mu, sigma, n_simulations=10000,
         Periode prediksi dalam tahun (default: 5)
     start_year : int
         Tahun awal prediksi (optional)
+    seed : int
+        Seed untuk random generator (optional). Jika None dan tidak ada
+        previous_result, seed baru dibangkitkan dan disimpan di hasil.
+    previous_result : dict
+        Hasil run_monte_carlo_simulation sebelumnya yang akan diperluas
+        (optional)
+    steps_per_year : int
+        Jumlah langkah per tahun (default: 1)
+    report_times : array-like
+        Waktu laporan dalam tahun (optional, default: setiap akhir tahun)
+    model : str
+        Model proses: 'gbm' (default), 'student_t', 'merton' atau 'log_ou'
+    model_params : dict
+        Parameter tambahan model (optional), lihat engines.py
+    chunk_size : int
+        Jumlah jalur per chunk (optional, default: semua sekaligus)
+    n_workers : int
+        Jumlah thread untuk menjalankan chunk secara paralel (default: 1)
     
     Returns:
     --------
     dict
         Dictionary berisi:
         - 'paths': array simulasi paths
-        - 'years': array tahun prediksi
+        - 'years': array tahun prediksi (pecahan untuk laporan sub-tahunan)
         - 'final_values': nilai akhir dari setiap simulasi
         - 'statistics': dict dengan Mean, P5, P50, P95
+        - 'seed': seed yang dipakai
+        - 'parameters': dict dengan S0, mu, sigma, report_times,
+          steps_per_year, model, model_params
+        - 'rng_states': state stream acak per interval (untuk perluasan)
     """
-    # Jalankan simulasi
-    paths = geometric_brownian_motion(S0, mu, sigma, prediction_years, 
-                                      dt=1.0, n_simulations=n_simulations)
+    times = report_time_grid(prediction_years, steps_per_year, report_times)
+    dt = np.diff(times)
+    n_intervals = len(dt)
+    engine = create_engine(model, S0, mu, sigma, **(model_params or {}))
+    
+    if _can_extend(previous_result, engine, n_simulations, times, seed,
+                   steps_per_year):
+        seed = previous_result['seed']
+        old_paths = previous_result['paths']
+        rng_states = previous_result['rng_states']
+    else:
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        old_paths = np.empty((0, 1))
+        rng_states = []
+    
+    old_n, old_intervals = old_paths.shape[0], old_paths.shape[1] - 1
+    generators = _interval_generators(seed, n_intervals, engine.n_variates,
+                                      rng_states)
+    
+    # Jalur lama + interval tambahan: lanjutkan dari kolom terakhir
+    if old_n > 0 and n_intervals > old_intervals:
+        extension = _simulate_chunked(
+            engine, old_paths[:, -1], dt[old_intervals:],
+            generators[old_intervals:], old_n, t0=times[old_intervals],
+            steps_per_year=steps_per_year, chunk_size=chunk_size, n_workers=n_workers)
+        old_paths = np.hstack([old_paths, extension[:, 1:]])
+    
+    # Jalur tambahan: lanjutan stream yang sama untuk semua tahun
+    n_new = n_simulations - old_n
+    if n_new > 0:
+        new_paths = _simulate_chunked(
+            engine, S0, dt, generators, n_new,
+            steps_per_year=steps_per_year, chunk_size=chunk_size, n_workers=n_workers)
+        paths = np.vstack([old_paths, new_paths]) if old_n > 0 else new_paths
+    else:
+        paths = old_paths
     
     # Generate tahun prediksi
     if start_year:
-        years = np.arange(start_year, start_year + prediction_years + 1)
+        years = start_year + times
     else:
-        years = np.arange(0, prediction_years + 1)
+        years = times
     
     # Ambil nilai akhir dari setiap simulasi
     final_values = paths[:, -1]
     
     # Hitung statistik
-    statistics = {
-        'Mean': np.mean(final_values),
-        'P5': np.percentile(final_values, 5),
-        'P50': np.percentile(final_values, 50),  # Median
-        'P95': np.percentile(final_values, 95)
-    }
+    statistics = calculate_statistics(final_values)
     
     return {
         'paths': paths,
         'years': years,
         'final_values': final_values,
-        'statistics': statistics
+        'statistics': statistics,
+        'seed': seed,
+        'parameters': {'S0': S0, 'mu': mu, 'sigma': sigma,
+                       'report_times': times, 'steps_per_year': steps_per_year,
+                       'model': engine.name, 'model_params': engine.params},
+        'rng_states': [[g.bit_generator.state for g in interval_generators]
+                       for interval_generators in generators]
     }
 
 
+def replay_simulation(simulation_results):
+    """
+    Menjalankan ulang simulasi dari seed dan parameter yang tersimpan di
+    hasil (misalnya hasil dari arsip run yang hanya menyimpan jalur contoh).
+    
+    Jalur yang dihasilkan identik bit demi bit dengan run aslinya.
+    
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil run_monte_carlo_simulation atau RunArchive.load
+    
+    Returns:
+    --------
+    dict
+        Hasil run_monte_carlo_simulation dengan semua jalur
+    """
+    params = simulation_results['parameters']
+    times = np.asarray(params['report_times'], dtype=float)
+    start_year = simulation_results['years'][0] - times[0]
+    n_simulations = simulation_results.get('n_simulations',
+                                           simulation_results['paths'].shape[0])
+    return run_monte_carlo_simulation(
+        params['S0'], params['mu'], params['sigma'],
+        n_simulations=n_simulations,
+        prediction_years=times[-1],
+        start_year=start_year or None,
+        seed=simulation_results['seed'],
+        steps_per_year=params.get('steps_per_year', 1),
+        report_times=times[1:],
+        model=params.get('model', 'gbm'),
+        model_params=params.get('model_params')
+    )
+
+
+def run_monte_carlo_progressive(S0, mu, sigma, n_simulations=10000,
+                                prediction_years=5, start_year=None,
+                                seed=None, previous_result=None,
+                                steps_per_year=1, report_times=None,
+                                model='gbm', model_params=None,
+                                chunk_size=None, n_workers=1,
+                                initial_batch=1000, growth_factor=2,
+                                run_batch=None):
+    """
+    Menjalankan simulasi Monte Carlo secara bertahap (progressive refinement).
+    
+    Jumlah jalur dimulai dari initial_batch lalu dikalikan growth_factor
+    sampai n_simulations. Setiap tahap memperluas hasil tahap sebelumnya
+    (lihat run_monte_carlo_simulation), sehingga hasil akhir identik dengan
+    satu kali run penuh dengan seed yang sama. Pemanggil dapat menampilkan
+    hasil sementara atau berhenti kapan saja di antara tahap.
+    
+    Parameters:
+    -----------
+    S0, mu, sigma, n_simulations, prediction_years, start_year, seed,
+    previous_result, steps_per_year, report_times, model, model_params,
+    chunk_size, n_workers :
+        Sama seperti run_monte_carlo_simulation
+    initial_batch : int
+        Jumlah jalur pada tahap pertama (default: 1000)
+    growth_factor : float
+        Faktor pertambahan jumlah jalur per tahap (default: 2)
+    run_batch : callable
+        Fungsi yang menjalankan satu tahap, dipanggil dengan argumen keyword
+        run_monte_carlo_simulation (optional, default: memanggil
+        run_monte_carlo_simulation langsung). Dipakai misalnya untuk
+        mengirim tahap ke executor bersama.
+    
+    Yields:
+    -------
+    dict
+        Hasil run_monte_carlo_simulation untuk setiap tahap
+    """
+    n_current = min(initial_batch, n_simulations)
+    times = report_time_grid(prediction_years, steps_per_year, report_times)
+    engine = create_engine(model, S0, mu, sigma, **(model_params or {}))
+    if _can_extend(previous_result, engine, n_simulations, times, seed,
+                   steps_per_year):
+        # Jalur yang sudah ada tidak perlu ditampilkan ulang dari tahap kecil
+        n_current = max(n_current, previous_result['paths'].shape[0])
+    
+    run_batch = run_batch or run_monte_carlo_simulation
+    result = previous_result
+    while True:
+        result = run_batch(
+            S0=S0, mu=mu, sigma=sigma, n_simulations=n_current,
+            prediction_years=prediction_years, start_year=start_year,
+            seed=seed, previous_result=result,
+            steps_per_year=steps_per_year, report_times=report_times,
+            model=model, model_params=model_params,
+            chunk_size=chunk_size, n_workers=n_workers)
+        seed = result['seed']
+        yield result
+        if n_current >= n_simulations:
+            break
+        n_current = min(int(n_current * growth_factor), n_simulations)
+
+
 def plot_simulation_paths(simulation_results, n_paths_to_show=100):
     """
     Membuat plot jalur simulasi dan distribusi hasil akhir.
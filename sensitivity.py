@@ -0,0 +1,251 @@
+"""
+Modul untuk analisis sensitivitas statistik prediksi (Mean, P5, P50, P95)
+terhadap parameter S0, mu dan sigma menggunakan common random numbers.
+
+Semua fungsi memakai ulang shock dari hasil run_monte_carlo_simulation,
+sehingga perbedaan antar skenario tidak tercampur noise sampling baru.
+"""
+
+import numpy as np
+import pandas as pd
+from monte_carlo import calculate_statistics
+
+
+PARAMETERS = ['S0', 'mu', 'sigma']
+QUANTILES = {'P5': 5, 'P50': 50, 'P95': 95}
+N_BATCHES = 20
+
+
+def _terminal_brownian(simulation_results):
+    """
+    Merekonstruksi W(T) setiap jalur dari nilai akhir simulasi GBM.
+
+    Karena S(T) = S0 * exp((μ - 0.5σ²)T + σW(T)), maka
+    W(T) = (ln(S(T)/S0) - (μ - 0.5σ²)T) / σ.
+
+    Returns:
+    --------
+    tuple
+        (S0, mu, sigma, T, W) dengan W array W(T) per jalur
+    """
+    params = simulation_results['parameters']
+    if params.get('model', 'gbm') != 'gbm':
+        raise ValueError(f"Analisis sensitivitas hanya tersedia untuk model 'gbm', bukan '{params['model']}'")
+    S0, mu, sigma = params['S0'], params['mu'], params['sigma']
+    T = params['report_times'][-1]
+    log_growth = np.log(simulation_results['final_values'] / S0)
+    W = (log_growth - (mu - 0.5 * sigma**2) * T) / sigma
+    return S0, mu, sigma, T, W
+
+
+def _revalue(S0, mu, sigma, T, W):
+    """
+    Menghitung ulang nilai akhir GBM dengan shock W(T) yang sama.
+    """
+    return S0 * np.exp((mu - 0.5 * sigma**2) * T + sigma * W)
+
+
+def _local_average(sorted_values, rank, window):
+    """
+    Rata-rata nilai terurut di sekitar rank tertentu (±window).
+    """
+    low = max(rank - window, 0)
+    high = min(rank + window + 1, len(sorted_values))
+    return np.mean(sorted_values[low:high])
+
+
+def _pathwise(final_values, S0, mu, sigma, T, W, window):
+    """
+    Turunan pathwise: dS/dθ dievaluasi di jalur sekitar kuantil.
+    """
+    derivatives = {
+        'S0': final_values / S0,
+        'mu': final_values * T,
+        'sigma': final_values * (W - sigma * T)
+    }
+    order = np.argsort(final_values)
+    n = len(final_values)
+
+    table = {}
+    for param, dS in derivatives.items():
+        column = {'Mean': np.mean(dS)}
+        sorted_dS = dS[order]
+        for name, q in QUANTILES.items():
+            rank = int(round(q / 100 * (n - 1)))
+            column[name] = _local_average(sorted_dS, rank, window)
+        table[param] = column
+    return table
+
+
+def _likelihood_ratio(final_values, S0, mu, sigma, T, W, window):
+    """
+    Turunan likelihood-ratio (score function) dari distribusi lognormal S(T).
+
+    Mean: E[S * score]. Kuantil: dq/dθ = -E[(1{S <= q} - p) * score] / f(q),
+    dengan densitas f(q) diestimasi dari jarak order statistic.
+
+    Standard error (kolom *_se) dihitung dengan batch means: estimator yang
+    sama dijalankan pada N_BATCHES kelompok jalur terpisah, sehingga noise
+    dari kuantil dan densitas yang diestimasi ikut terhitung.
+    """
+    table = _likelihood_ratio_estimate(final_values, S0, sigma, T, W, window)
+    n_batches = min(N_BATCHES, len(final_values) // 2)
+    batch_window = max(1, window // max(n_batches, 1))
+    batches = [
+        _likelihood_ratio_estimate(final_values[index], S0, sigma, T,
+                                   W[index], batch_window)
+        for index in np.array_split(np.arange(len(final_values)), n_batches)
+    ] if n_batches >= 2 else []
+
+    for param in PARAMETERS:
+        table[f"{param}_se"] = {
+            name: (np.std([batch[param][name] for batch in batches], ddof=1)
+                   / np.sqrt(n_batches) if batches else np.nan)
+            for name in table[param]
+        }
+    return table
+
+
+def _likelihood_ratio_estimate(final_values, S0, sigma, T, W, window):
+    """
+    Estimasi titik turunan likelihood-ratio (lihat _likelihood_ratio).
+    """
+    z = W / np.sqrt(T)
+    scores = {
+        'S0': z / (S0 * sigma * np.sqrt(T)),
+        'mu': z * np.sqrt(T) / sigma,
+        'sigma': -z * np.sqrt(T) + (z**2 - 1) / sigma
+    }
+    sorted_values = np.sort(final_values)
+    n = len(final_values)
+
+    table = {}
+    for param, score in scores.items():
+        column = {'Mean': np.mean(final_values * score)}
+        for name, q in QUANTILES.items():
+            rank = int(round(q / 100 * (n - 1)))
+            low = max(rank - window, 0)
+            high = min(rank + window, n - 1)
+            density = (high - low) / n / (sorted_values[high] - sorted_values[low])
+            quantile = sorted_values[rank]
+            indicator = (final_values <= quantile) - q / 100
+            column[name] = -np.mean(indicator * score) / density
+        table[param] = column
+    return table
+
+
+def quantile_sensitivities(simulation_results, method='pathwise', window=None):
+    """
+    Menghitung turunan Mean/P5/P50/P95 terhadap S0, mu dan sigma.
+
+    Tidak ada simulasi ulang: turunan dihitung dari shock yang sama dengan
+    hasil yang sedang ditampilkan.
+
+    Metode likelihood-ratio tidak bias tetapi variansnya jauh lebih besar,
+    terutama untuk sigma kecil (score sigma berskala 1/sigma). Gunakan
+    pathwise kecuali perlu pembanding, dan cek kolom *_se sebelum memakai
+    hasil likelihood-ratio.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    method : str
+        'pathwise' (default) atau 'likelihood_ratio'
+    window : int
+        Jumlah order statistic di kiri-kanan kuantil yang dirata-ratakan
+        (default: 1% dari jumlah simulasi, minimal 1)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Index Mean, P5, P50, P95; kolom S0, mu, sigma. Nilai adalah
+        perubahan statistik (Rupiah) per satu satuan perubahan parameter.
+        Untuk 'likelihood_ratio' ditambah kolom S0_se, mu_se, sigma_se
+        (standard error Monte Carlo setiap turunan).
+    """
+    S0, mu, sigma, T, W = _terminal_brownian(simulation_results)
+    final_values = simulation_results['final_values']
+    if window is None:
+        window = max(1, len(final_values) // 100)
+
+    if method == 'pathwise':
+        table = _pathwise(final_values, S0, mu, sigma, T, W, window)
+    elif method == 'likelihood_ratio':
+        table = _likelihood_ratio(final_values, S0, mu, sigma, T, W, window)
+    else:
+        raise ValueError(f"method tidak dikenal: {method}. Gunakan 'pathwise' atau 'likelihood_ratio'")
+
+    columns = [column for param in PARAMETERS
+               for column in (param, f"{param}_se") if column in table]
+    return pd.DataFrame(table).loc[['Mean', 'P5', 'P50', 'P95'], columns]
+
+
+def parameter_sweep(simulation_results, mu_values, sigma_values):
+    """
+    Menghitung statistik untuk setiap kombinasi (mu, sigma) pada grid
+    dengan shock yang sama.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    mu_values : array-like
+        Nilai mu yang dicoba
+    sigma_values : array-like
+        Nilai sigma yang dicoba
+
+    Returns:
+    --------
+    pd.DataFrame
+        Satu baris per kombinasi dengan kolom mu, sigma, Mean, P5, P50, P95
+    """
+    S0, _, _, T, W = _terminal_brownian(simulation_results)
+    rows = []
+    for mu in mu_values:
+        for sigma in sigma_values:
+            final_values = _revalue(S0, mu, sigma, T, W)
+            rows.append({'mu': mu, 'sigma': sigma,
+                         **calculate_statistics(final_values)})
+    return pd.DataFrame(rows)
+
+
+def tornado_data(simulation_results, statistic='P95', relative_change=0.1):
+    """
+    Menyiapkan data tornado chart: statistik saat tiap parameter dinaikkan
+    dan diturunkan sebesar relative_change, parameter lain tetap.
+
+    Parameters:
+    -----------
+    simulation_results : dict
+        Hasil dari run_monte_carlo_simulation
+    statistic : str
+        Statistik yang dianalisis: Mean, P5, P50 atau P95 (default: 'P95')
+    relative_change : float
+        Perubahan relatif parameter (default: 0.1 = 10%)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Kolom parameter, low, high, base dan range, diurutkan dari range
+        terbesar
+    """
+    S0, mu, sigma, T, W = _terminal_brownian(simulation_results)
+    base_params = {'S0': S0, 'mu': mu, 'sigma': sigma}
+    base = simulation_results['statistics'][statistic]
+
+    rows = []
+    for param in PARAMETERS:
+        values = []
+        for factor in (1 - relative_change, 1 + relative_change):
+            params = dict(base_params)
+            params[param] = params[param] * factor
+            final_values = _revalue(params['S0'], params['mu'],
+                                    params['sigma'], T, W)
+            values.append(calculate_statistics(final_values)[statistic])
+        rows.append({'parameter': param, 'low': values[0],
+                     'high': values[1], 'base': base})
+
+    tornado = pd.DataFrame(rows)
+    tornado['range'] = (tornado['high'] - tornado['low']).abs()
+    return tornado.sort_values('range', ascending=False).reset_index(drop=True)
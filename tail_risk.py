@@ -0,0 +1,139 @@
+"""
+Modul untuk estimasi probabilitas ekor (threshold exceedance) dengan
+importance sampling di atas engine Geometric Brownian Motion.
+"""
+
+import numpy as np
+from monte_carlo import geometric_brownian_motion, report_time_grid
+
+
+def optimal_tilt(threshold, S0, mu, sigma, T):
+    """
+    Menghitung drift tilt θ agar median log S(T) berada tepat di threshold.
+
+    Di bawah drift tilt, W(t) mendapat drift tambahan θ sehingga
+    ln S(T) ~ N(ln S0 + (μ - 0.5σ²)T + σθT, σ²T).
+
+    Returns:
+    --------
+    float
+        θ = (ln(threshold/S0) - (μ - 0.5σ²)T) / (σT)
+    """
+    return (np.log(threshold / S0) - (mu - 0.5 * sigma**2) * T) / (sigma * T)
+
+
+def tail_probability(threshold, S0, mu, sigma, prediction_years=5,
+                     n_simulations=10000, tail='upper', path_max=False,
+                     tilt=None, target_relative_error=None,
+                     max_simulations=1000000, steps_per_year=1,
+                     report_times=None, seed=None):
+    """
+    Estimasi P(S(T) > threshold) dengan importance sampling.
+
+    Shock disimulasikan di bawah drift yang di-tilt secara eksponensial ke
+    arah threshold, lalu setiap jalur diberi bobot likelihood ratio
+    dP/dQ = exp(-θW(T) + 0.5θ²T). Estimator tetap unbiased, tetapi jalur
+    yang melewati threshold jauh lebih sering muncul dibanding simulasi biasa.
+
+    Parameters:
+    -----------
+    threshold : float
+        Nilai ambang (Rupiah/Bulan)
+    S0 : float
+        Nilai awal (harga terakhir)
+    mu : float
+        Drift parameter
+    sigma : float
+        Volatility parameter
+    prediction_years : int
+        Periode prediksi dalam tahun (default: 5)
+    n_simulations : int
+        Jumlah jalur per batch (default: 10000)
+    tail : str
+        'upper' untuk P(S > threshold), 'lower' untuk P(S < threshold)
+    path_max : bool
+        Jika True, kejadian dihitung bila threshold terlewati pada waktu
+        laporan mana pun sampai akhir periode (bukan hanya di akhir)
+    tilt : float
+        Drift tilt θ (optional, default: optimal_tilt)
+    target_relative_error : float
+        Jika diberikan, batch ditambah sampai standard error relatif di
+        bawah target atau max_simulations tercapai (optional)
+    max_simulations : int
+        Batas jumlah jalur total (default: 1000000)
+    steps_per_year : int
+        Jumlah langkah per tahun (default: 1)
+    report_times : array-like
+        Waktu laporan dalam tahun (optional)
+    seed : int
+        Seed untuk random generator (optional)
+
+    Returns:
+    --------
+    dict
+        Dictionary berisi:
+        - 'probability': estimasi probabilitas
+        - 'standard_error': standard error estimasi
+        - 'relative_error': standard_error / probability
+        - 'effective_sample_size': Kish ESS dari bobot jalur yang melewati
+          threshold
+        - 'n_simulations': jumlah jalur yang dipakai
+        - 'n_hits': jumlah jalur yang melewati threshold
+        - 'tilt': drift tilt θ yang dipakai
+    """
+    if tail not in ('upper', 'lower'):
+        raise ValueError(f"tail tidak dikenal: {tail}. Gunakan 'upper' atau 'lower'")
+
+    times = report_time_grid(prediction_years, steps_per_year, report_times)
+    dt = np.diff(times)
+    T = times[-1]
+    if tilt is None:
+        tilt = optimal_tilt(threshold, S0, mu, sigma, T)
+        # Tilt hanya berguna jika mengarah ke ekor yang dicari
+        tilt = max(tilt, 0.0) if tail == 'upper' else min(tilt, 0.0)
+
+    rng = np.random.default_rng(seed)
+    sum_x = sum_x2 = sum_w_hit = sum_w2_hit = 0.0
+    n_total = n_hits = 0
+
+    while True:
+        shocks = rng.standard_normal((n_simulations, len(dt))) + tilt * np.sqrt(dt)
+        paths = geometric_brownian_motion(S0, mu, sigma, len(dt), dt=dt,
+                                          n_simulations=n_simulations,
+                                          random_shocks=shocks)
+        values = paths[:, 1:] if path_max else paths[:, -1:]
+        if tail == 'upper':
+            hit = np.any(values > threshold, axis=1)
+        else:
+            hit = np.any(values < threshold, axis=1)
+
+        W_T = shocks @ np.sqrt(dt)
+        weights = np.exp(-tilt * W_T + 0.5 * tilt**2 * T)
+        x = weights * hit
+
+        sum_x += np.sum(x)
+        sum_x2 += np.sum(x**2)
+        sum_w_hit += np.sum(weights[hit])
+        sum_w2_hit += np.sum(weights[hit]**2)
+        n_total += n_simulations
+        n_hits += int(np.sum(hit))
+
+        probability = sum_x / n_total
+        variance = max(sum_x2 / n_total - probability**2, 0.0)
+        standard_error = np.sqrt(variance / n_total)
+        relative_error = standard_error / probability if probability > 0 else np.inf
+
+        if (target_relative_error is None
+                or relative_error <= target_relative_error
+                or n_total + n_simulations > max_simulations):
+            break
+
+    return {
+        'probability': probability,
+        'standard_error': standard_error,
+        'relative_error': relative_error,
+        'effective_sample_size': sum_w_hit**2 / sum_w2_hit if sum_w2_hit > 0 else 0.0,
+        'n_simulations': n_total,
+        'n_hits': n_hits,
+        'tilt': tilt
+    }